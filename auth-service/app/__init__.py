@@ -1,6 +1,7 @@
-from flask import Flask
+from flask import Flask, jsonify
 from .config import Config
 from .extensions import db, jwt, limiter, cors
+from .hashing import HashingBusy, password_hasher
 from .routes import auth
 
 
@@ -17,6 +18,18 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    password_hasher.configure(
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_MAX_PENDING'],
+        app.config['PASSWORD_HASH_METHOD'],
+        app.config['PASSWORD_HASH_TIMEOUT']
+    )
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(e):
+        db.session.rollback()
+        return jsonify({"error": "Servicio saturado, inténtalo de nuevo"}), 503, {"Retry-After": "1"}
+
     # Registrar Blueprints
     app.register_blueprint(auth)
 
@@ -17,3 +17,20 @@ class Config:
     JWT_QUERY_STRING_NAME = 'token'
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Flask-Limiter con los contadores en Postgres, compartidos entre réplicas
+    # (RATELIMIT_SHARED=false vuelve a la memoria de cada proceso). Cada réplica
+    # sincroniza sus hits cada RATELIMIT_SYNC_INTERVAL s; ver ratelimit_storage.py
+    RATELIMIT_STORAGE_URI = (
+        SQLALCHEMY_DATABASE_URI.set(drivername='postgresql+ratelimit').render_as_string(hide_password=False)
+        if os.environ.get('RATELIMIT_SHARED', 'true').lower() == 'true' else 'memory://'
+    )
+    RATELIMIT_STORAGE_OPTIONS = {'sync_interval': float(os.environ.get('RATELIMIT_SYNC_INTERVAL', 0.25))}
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+
+    # Hashing de contraseñas en un pool de procesos (0 workers = en el hilo de la petición).
+    # Cambiar PASSWORD_HASH_METHOD rehashea a cada usuario en su siguiente login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """La cola del pool de hashing está llena; la petición debe responder 503."""
+
+
+class PasswordHasher:
+    """
+    Calcula y verifica hashes de contraseñas en un pool de procesos acotado,
+    fuera del hilo de la petición, para que una ráfaga de sign-ins no deje
+    sin CPU al resto de peticiones del pod.
+
+    Como mucho `max_pending` hashes pueden estar en cola o en curso; el
+    siguiente lanza HashingBusy en lugar de esperar. Con `workers` = 0 el
+    hash se calcula en el propio hilo (sin pool).
+
+    `method` es el método de Werkzeug ('scrypt:32768:8:1',
+    'pbkdf2:sha256:600000', ...). Un hash guardado con otro método se
+    considera obsoleto (needs_rehash) y se recalcula en el siguiente login.
+    """
+
+    def __init__(self, workers=1, max_pending=8, method='scrypt', timeout=10):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.method = method
+        self.timeout = timeout
+        self._prefix = None
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+
+    def configure(self, workers, max_pending, method, timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.method = method
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Werkzeug completa los parámetros por defecto ('scrypt' -> 'scrypt:32768:8:1')
+        self._prefix = generate_password_hash('x', method=method).split('$', 1)[0]
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        if self._prefix is None:
+            self._prefix = generate_password_hash('x', method=self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def _run(self, fn, *args, **kwargs):
+        if self.workers <= 0:
+            return fn(*args, **kwargs)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_pool().submit(fn, *args, **kwargs)
+        except Exception:
+            slots.release()
+            raise
+        # El hueco se libera cuando el hash termina, aunque la petición ya no espere
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy()
+
+    def _get_pool(self):
+        # Se crea en el primer uso, ya dentro del worker que atiende peticiones;
+        # 'spawn' evita heredar hilos y conexiones del proceso padre.
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+
+password_hasher = PasswordHasher()
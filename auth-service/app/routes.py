@@ -5,6 +5,7 @@ from flask_jwt_extended import (
 from .models import User
 from .schemas import UserCreateSchema, UserSignInSchema, UserSchema
 from .extensions import db, limiter
+from .hashing import HashingBusy
 
 auth = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -33,6 +34,15 @@ def sign_in():
     if not user or not user.check_password(data['password']):
         return jsonify({"error": "Credenciales inválidas"}), 401
 
+    # Los parámetros de hash cambiaron desde que se guardó: se actualiza ahora que tenemos la contraseña
+    if user.password_needs_rehash():
+        try:
+            user.set_password(data['password'])
+            db.session.commit()
+        except HashingBusy:
+            # El rehash es opcional: con el pool lleno se reintenta en otro inicio de sesión
+            pass
+
     access_token = create_access_token(identity=user.id)
     refresh_token = create_refresh_token(identity=user.id)
 
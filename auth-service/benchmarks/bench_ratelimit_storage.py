@@ -0,0 +1,121 @@
+"""
+Coste y precisión del almacenamiento de límites en Postgres frente a memory://.
+
+Rendimiento: N hilos llaman a limiter.hit (ventana deslizante) en bucle
+sobre --keys claves distintas, con un límite que no se alcanza, y se mide
+hits/s y p99 de cada llamada con memory:// y con postgresql+ratelimit://.
+
+Precisión: --replicas procesos, cada uno con su propio almacenamiento como
+un pod, golpean la misma clave con un límite de --limit por minuto; se
+cuenta cuántos hits se admiten en total. Con memory:// cada réplica admite
+el límite entero; con Postgres el exceso queda acotado por lo que cabe en
+un intervalo de sincronización.
+
+Uso (desde auth-service/, con DATABASE_URL apuntando a Postgres):
+    python benchmarks/bench_ratelimit_storage.py --threads 16 --seconds 10 --replicas 4
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import SlidingWindowCounterRateLimiter  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app import ratelimit_storage  # noqa: E402, F401
+
+
+def throughput(uri, threads, seconds, keys, sync_interval):
+    options = {'sync_interval': sync_interval} if uri.startswith('postgresql') else {}
+    storage = storage_from_string(uri, **options)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    item = parse('1000000000/hour')
+    prefix = uuid.uuid4().hex[:8]
+    deadline = time.perf_counter() + seconds
+    latencies = [[] for _ in range(threads)]
+
+    def worker(i):
+        n = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            limiter.hit(item, f"{prefix}:{n % keys}")
+            latencies[i].append(time.perf_counter() - start)
+            n += threads
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    samples = sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(
+        f"  {uri.split('://')[0]:22} {len(samples) / seconds:10.0f} hits/s   "
+        f"p50 {statistics.median(samples) * 1e6:7.1f} µs   p99 {p99 * 1e6:8.1f} µs"
+    )
+
+
+def replica(uri, key, limit, seconds, sync_interval, start, results):
+    options = {'sync_interval': sync_interval} if uri.startswith('postgresql') else {}
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri, **options))
+    item = parse(f"{limit}/minute")
+    start.wait()
+    admitted = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        admitted += limiter.hit(item, key)
+        time.sleep(0.001)
+    results.put(admitted)
+
+
+def accuracy(uri, replicas, limit, seconds, sync_interval):
+    key = f"bench:{uuid.uuid4().hex[:8]}"
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=replica, args=(uri, key, limit, seconds, sync_interval, start, results))
+        for _ in range(replicas)
+    ]
+    for proc in procs:
+        proc.start()
+    start.set()
+    admitted = sum(results.get(timeout=seconds + 60) for _ in procs)
+    for proc in procs:
+        proc.join()
+    print(f"  {uri.split('://')[0]:22} admitidos {admitted:6d} de un límite de {limit} ({admitted / limit:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--keys', type=int, default=1000)
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--sync-interval', type=float, default=0.25)
+    args = parser.parse_args()
+
+    pg_uri = make_url(os.environ['DATABASE_URL']).set(drivername='postgresql+ratelimit').render_as_string(hide_password=False)
+    uris = ['memory://', pg_uri]
+
+    print(f"Rendimiento: {args.threads} hilos, {args.keys} claves, {args.seconds:.0f} s")
+    for uri in uris:
+        throughput(uri, args.threads, args.seconds, args.keys, args.sync_interval)
+
+    print(f"Precisión: {args.replicas} réplicas contra una clave de {args.limit}/minuto, "
+          f"sincronización cada {args.sync_interval:g} s")
+    for uri in uris:
+        accuracy(uri, args.replicas, args.limit, args.seconds, args.sync_interval)
+
+
+if __name__ == '__main__':
+    main()
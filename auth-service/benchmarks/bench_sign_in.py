@@ -0,0 +1,132 @@
+"""
+Sign-in bajo carga concurrente: hash en el hilo de la petición frente al
+pool de procesos acotado.
+
+N hilos hacen sign-in en bucle contra la app (test client) mientras otros
+hilos llaman a /auth/refresh, que no calcula ningún hash, para ver cuánto
+retrasa el hashing al resto de peticiones. Para cada modo informa de
+sign-ins/s, p50/p99 de los que responden 200, cuántos reciben 503, y el
+p99 de /auth/refresh.
+
+Para reproducir un pod de 250m, limita la CPU del proceso, p. ej.:
+    taskset -c 0 python benchmarks/bench_sign_in.py
+
+Uso (desde auth-service/, con DATABASE_URL apuntando a Postgres):
+    python benchmarks/bench_sign_in.py --threads 32 --seconds 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.hashing import password_hasher  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+def run(app, email, password, refresh_token, threads, readers, seconds):
+    sign_ins, refreshes, busy = [], [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def sign_in_worker():
+        client = app.test_client()
+        local, rejected = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = client.post('/auth/sign-in', json={'email': email, 'password': password})
+            if response.status_code == 200:
+                local.append(time.perf_counter() - start)
+            elif response.status_code == 503:
+                rejected += 1
+            else:
+                raise RuntimeError(f"sign-in devolvió {response.status_code}")
+        with lock:
+            sign_ins.extend(local)
+            busy.append(rejected)
+
+    def refresh_worker():
+        client = app.test_client()
+        headers = {'Authorization': f"Bearer {refresh_token}"}
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            client.post('/auth/refresh', headers=headers)
+            local.append(time.perf_counter() - start)
+        with lock:
+            refreshes.extend(local)
+
+    workers = [threading.Thread(target=sign_in_worker) for _ in range(threads)]
+    workers += [threading.Thread(target=refresh_worker) for _ in range(readers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sign_ins, refreshes, sum(busy)
+
+
+def p99(values):
+    return values[int(len(values) * 0.99) - 1] if values else 0
+
+
+def report(name, sign_ins, refreshes, busy, seconds):
+    sign_ins.sort()
+    refreshes.sort()
+    print(
+        f"  {name:<8} {len(sign_ins) / seconds:7.1f} sign-ins/s   "
+        f"p50 {statistics.median(sign_ins or [0]) * 1000:7.1f} ms   p99 {p99(sign_ins) * 1000:7.1f} ms   "
+        f"503: {busy}   refresh p99 {p99(refreshes) * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--readers', type=int, default=4, help='hilos llamando a /auth/refresh')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=1, help='procesos del pool de hashing')
+    parser.add_argument('--max-pending', type=int, default=8)
+    args = parser.parse_args()
+
+    Config.RATELIMIT_ENABLED = False
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': args.threads + args.readers, 'max_overflow': 0}
+    app = create_app()
+
+    tag = uuid.uuid4().hex[:8]
+    email, password = f"bench_{tag}@threadfit.dev", "bench-password"
+    with app.app_context():
+        user = User(username=f"bench_{tag}", email=email)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    refresh_token = app.test_client().post(
+        '/auth/sign-in', json={'email': email, 'password': password}
+    ).get_json()['refresh_token']
+
+    method = app.config['PASSWORD_HASH_METHOD']
+    print(f"{args.threads} hilos de sign-in + {args.readers} de refresh, {method}, {args.seconds:.0f} s por modo")
+    try:
+        modes = [("inline", 0, args.max_pending), ("pool", args.workers, args.max_pending)]
+        for name, workers, max_pending in modes:
+            password_hasher.configure(workers, max_pending, method, app.config['PASSWORD_HASH_TIMEOUT'])
+            sign_ins, refreshes, busy = run(
+                app, email, password, refresh_token, args.threads, args.readers, args.seconds
+            )
+            report(name, sign_ins, refreshes, busy, args.seconds)
+    finally:
+        with app.app_context():
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
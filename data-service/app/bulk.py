@@ -0,0 +1,415 @@
+import hashlib
+import itertools
+import logging
+import math
+import multiprocessing
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+from faker import Faker
+
+from profiles import AffinePermutation, resolve_profile, zipf_norm, zipf_rank, zipf_weight
+
+logger = logging.getLogger(__name__)
+
+# Orden de carga: cada tabla solo referencia a las anteriores
+TABLES = ('users', 'posts', 'comments', 'likes')
+
+# Tablas que se pueden cargar a la vez (comments y likes solo dependen de posts)
+STAGES = (('users',), ('posts',), ('comments', 'likes'))
+
+# Fin por defecto del intervalo de fechas: fijo, para que la misma semilla
+# dé las mismas filas en cualquier máquina y en cualquier día
+DEFAULT_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+COPY_SQL = {
+    'users': "COPY users (id, username, email, password_hash) FROM STDIN",
+    'posts': "COPY posts (id, content, timestamp, user_id, likes_count, comments_count) FROM STDIN",
+    'comments': "COPY comments (id, content, timestamp, user_id, post_id) FROM STDIN",
+    'likes': "COPY likes (id, user_id, post_id) FROM STDIN",
+}
+
+# Índices secundarios de las tablas (ni la clave primaria ni los que respaldan
+# una restricción, como _user_post_uc, que siguen validando la carga)
+SECONDARY_INDEXES_SQL = """
+    SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    WHERE i.indrelid = ANY(CAST(%s AS regclass[]))
+      AND NOT i.indisprimary
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+"""
+
+SYNTHETIC_PASSWORD_HASH = "synthetic_password_hash"
+
+# Avance de un trabajo de generation_jobs (ver jobs.py), en la transacción
+# de cada trozo: `done` cuenta justo las filas confirmadas
+ADVANCE_JOB_SQL = """
+    UPDATE generation_jobs SET done = done + %s, updated_at = now()
+    WHERE id = %s
+    RETURNING status
+"""
+
+
+class LoadCancelled(Exception):
+    """Han cancelado el trabajo de la carga; los trozos ya confirmados se quedan."""
+
+
+def _digest(seed, parts, size):
+    return hashlib.blake2b(f"{seed}:{':'.join(map(str, parts))}".encode(), digest_size=size).digest()
+
+
+def _hash(seed, *parts):
+    return int.from_bytes(_digest(seed, parts, 8), 'big')
+
+
+def _unit(seed, *parts):
+    """Número en [0, 1) derivado de la semilla."""
+    return _hash(seed, *parts) / 2 ** 64
+
+
+def entity_id(seed, *parts):
+    """UUID v4 derivado de la semilla: la misma fila tiene siempre el mismo ID."""
+    return uuid.UUID(bytes=_digest(seed, parts, 16), version=4)
+
+
+class Dataset:
+    """
+    Conjunto sintético de usuarios, posts, comentarios y likes descrito solo
+    por sus tamaños y una semilla. Cualquier fila se puede calcular por su
+    índice sin consultar la base de datos ni guardar las anteriores, así que
+    el conjunto se genera en streaming y con memoria constante.
+
+    El reparto lo decide `profile` (ver profiles.py). Con 'uniform', los
+    comentarios y likes se reparten por igual entre los posts y los usuarios
+    y las fechas son uniformes. Con 'skewed', likes y comentarios por post
+    siguen una Zipf (pocos posts muy calientes, como los que se disputan
+    posts.likes_count), la actividad por usuario tiene cola larga y los
+    posts se concentran en ráfagas. Con Zipf los totales de likes y
+    comentarios son aproximados; los posts llevan siempre sus likes_count y
+    comments_count finales, coherentes con las filas generadas.
+
+    Los usernames y emails llevan un sufijo único (etiqueta de la semilla e
+    índice), porque Faker repite nombres enseguida.
+
+    Con la misma semilla, tamaños, `days` y `end`, el conjunto es idéntico
+    se genere entero o por trozos, en el orden que sea: así se reparte entre
+    procesos (load con workers > 1) sin perder la reproducibilidad.
+    """
+
+    def __init__(self, users, posts=0, comments=0, likes=0, seed=None, days=30, end=None, profile=None):
+        if min(users, posts, comments, likes) < 0:
+            raise ValueError("Los tamaños no pueden ser negativos")
+        if (posts or comments or likes) and not users:
+            raise ValueError("Hacen falta usuarios para generar posts, comentarios o likes")
+        if (comments or likes) and not posts:
+            raise ValueError("Hacen falta posts para generar comentarios o likes")
+        if posts and -(-likes // posts) > users:
+            raise ValueError("Hay más likes por post que usuarios")
+        if days < 1:
+            raise ValueError("days debe ser al menos 1")
+
+        self.users = users
+        self.posts = posts
+        self.comments = comments
+        self.likes = likes
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.span = int(timedelta(days=days).total_seconds())
+        self.days = days
+        self.end = end or DEFAULT_END
+        self.profile = resolve_profile(profile)
+        self.tag = f"{_hash(self.seed, 'tag'):x}"[:6]
+        self.faker = Faker()
+
+        post_skew, user_skew = self.profile['post_skew'], self.profile['user_skew']
+        if post_skew and posts:
+            self._post_rank = AffinePermutation(posts, _hash(self.seed, 'post_rank_a'), _hash(self.seed, 'post_rank_b'))
+            self._post_norm = zipf_norm(posts, post_skew)
+        if user_skew and users:
+            self._user_at_rank = AffinePermutation(users, _hash(self.seed, 'user_rank_a'), _hash(self.seed, 'user_rank_b'))
+
+    def spec(self):
+        """Argumentos para reconstruir el mismo conjunto en otro proceso."""
+        return dict(
+            users=self.users, posts=self.posts, comments=self.comments, likes=self.likes,
+            seed=self.seed, days=self.days, end=self.end, profile=self.profile
+        )
+
+    def total(self, table):
+        """Filas pedidas de `table` (con Zipf, las generadas se quedan cerca)."""
+        return {'users': self.users, 'posts': self.posts, 'comments': self.comments, 'likes': self.likes}[table]
+
+    def domain(self, table):
+        """Número de índices que recorre rows(): usuarios para 'users', posts para el resto."""
+        return self.users if table == 'users' else self.posts
+
+    def rows(self, table, start=0, stop=None):
+        """Filas de `table` para los índices [start, stop) de su dominio."""
+        stop = self.domain(table) if stop is None else stop
+        return getattr(self, f"_{table}_rows")(start, stop)
+
+    # Reparto
+
+    def user_id(self, index):
+        return entity_id(self.seed, 'user', index)
+
+    def post_id(self, index):
+        return entity_id(self.seed, 'post', index)
+
+    def pick_user(self, *parts):
+        """Usuario para el papel `parts` (autor, comentarista...), con la actividad del perfil."""
+        if not self.profile['user_skew']:
+            return _hash(self.seed, *parts) % self.users
+        rank = zipf_rank(self.users, self.profile['user_skew'], _unit(self.seed, *parts))
+        return self._user_at_rank(rank)
+
+    def post_author(self, post):
+        return self.pick_user('author', post)
+
+    def _per_post(self, total, post, kind):
+        if not self.profile['post_skew']:
+            return total // self.posts + (post < total % self.posts)
+        # Parte esperada según el rango del post, con redondeo aleatorio reproducible
+        expected = total * zipf_weight(self._post_rank(post), self.profile['post_skew'], self._post_norm)
+        return int(expected) + (_unit(self.seed, kind, post) < expected % 1)
+
+    def likes_for(self, post):
+        return min(self._per_post(self.likes, post, 'likes_round'), self.users)
+
+    def comments_for(self, post):
+        return self._per_post(self.comments, post, 'comments_round')
+
+    def post_timestamp(self, post):
+        profile = self.profile
+        if profile['bursts'] and _unit(self.seed, 'in_burst', post) < profile['burst_fraction']:
+            burst = _hash(self.seed, 'burst', post) % profile['bursts']
+            center = _hash(self.seed, 'burst_center', burst) % self.span
+            # Triangular en ±burst_hours alrededor del centro de la ráfaga
+            width = profile['burst_hours'] * 3600
+            offset = (_unit(self.seed, 'burst_a', post) + _unit(self.seed, 'burst_b', post) - 1) * width
+            seconds = min(max(int(center + offset), 0), self.span - 1)
+        else:
+            seconds = _hash(self.seed, 'post_ts', post) % self.span
+        return self.end - timedelta(seconds=seconds)
+
+    def comment_delay(self, post, n, age):
+        """Segundos desde el post hasta el comentario, sin pasar de `end`."""
+        mean_hours = self.profile['comment_delay_hours']
+        if mean_hours is None:
+            return _hash(self.seed, 'comment_ts', post, n) % age
+        delay = -math.log(1 - _unit(self.seed, 'comment_ts', post, n)) * mean_hours * 3600
+        return min(int(delay), age - 1)
+
+    def likers(self, post, count):
+        """Índices de `count` usuarios distintos que dan 'me gusta' a `post`."""
+        offset = _hash(self.seed, 'likers', post)
+        if not self.profile['user_skew'] or count * 2 > self.users:
+            # Consecutivos desde un desplazamiento: únicos sin comprobarlo
+            return [(offset + n) % self.users for n in range(count)]
+        # Según la actividad del perfil; si un usuario ya está, el siguiente libre
+        chosen = []
+        seen = set()
+        for n in range(count):
+            user = self.pick_user('liker', post, n)
+            while user in seen:
+                user = (user + 1) % self.users
+            seen.add(user)
+            chosen.append(user)
+        return chosen
+
+    # Generadores de filas
+
+    def _reseed(self, table, index):
+        # Faker se siembra por usuario o por post: el contenido no depende de
+        # cómo se trocee la carga
+        self.faker.seed_instance(_hash(self.seed, table, index))
+
+    def _users_rows(self, start, stop):
+        for index in range(start, stop):
+            self._reseed('users', index)
+            name, domain = self.faker.user_name(), self.faker.free_email_domain()
+            username = f"{name}_{self.tag}_{index}"
+            yield self.user_id(index), username, f"{username}@{domain}", SYNTHETIC_PASSWORD_HASH
+
+    def _posts_rows(self, start, stop):
+        for post in range(start, stop):
+            self._reseed('posts', post)
+            yield (
+                self.post_id(post), self.faker.text(max_nb_chars=200), self.post_timestamp(post),
+                self.user_id(self.post_author(post)), self.likes_for(post), self.comments_for(post)
+            )
+
+    def _comments_rows(self, start, stop):
+        for post in range(start, stop):
+            self._reseed('comments', post)
+            post_id = self.post_id(post)
+            posted_at = self.post_timestamp(post)
+            age = max(int((self.end - posted_at).total_seconds()), 1)
+            for n in range(self.comments_for(post)):
+                yield (
+                    entity_id(self.seed, 'comment', post, n), self.faker.text(max_nb_chars=100),
+                    posted_at + timedelta(seconds=self.comment_delay(post, n, age)),
+                    self.user_id(self.pick_user('commenter', post, n)), post_id
+                )
+
+    def _likes_rows(self, start, stop):
+        for post in range(start, stop):
+            post_id = self.post_id(post)
+            for n, user in enumerate(self.likers(post, self.likes_for(post))):
+                yield entity_id(self.seed, 'like', post, n), self.user_id(user), post_id
+
+
+def conninfo_for(database_uri):
+    # psycopg no entiende el nombre de driver de SQLAlchemy
+    return database_uri.set(drivername='postgresql').render_as_string(hide_password=False)
+
+
+def copy_rows(conn, table, rows, chunk_size, on_chunk=None, job_id=None):
+    """
+    Escribe `rows` en `table` con COPY FROM STDIN en trozos de `chunk_size`
+    filas, con un commit por trozo. Devuelve el número de filas escritas.
+
+    Con `job_id`, cada trozo avanza ese trabajo en su misma transacción y,
+    si lo han cancelado, se para tras confirmarlo con LoadCancelled.
+    """
+    rows = iter(rows)
+    written = 0
+    while True:
+        chunk = 0
+        status = None
+        with conn.cursor() as cur:
+            with cur.copy(COPY_SQL[table]) as copy:
+                for row in itertools.islice(rows, chunk_size):
+                    copy.write_row(row)
+                    chunk += 1
+            if job_id and chunk:
+                status = cur.execute(ADVANCE_JOB_SQL, (chunk, job_id)).fetchone()[0]
+        conn.commit()
+        written += chunk
+        if on_chunk and chunk:
+            on_chunk(table, chunk)
+        if status == 'cancelling':
+            raise LoadCancelled()
+        if chunk < chunk_size:
+            return written
+
+
+@contextmanager
+def deferred_indexes(conn, tables):
+    """Borra los índices secundarios de `tables` y los vuelve a crear al salir."""
+    indexes = conn.execute(SECONDARY_INDEXES_SQL, (list(tables),)).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        conn.rollback()
+        for name, definition in indexes:
+            started = time.perf_counter()
+            conn.execute(definition)
+            conn.commit()
+            logger.info(f"Recreated index {name} in {time.perf_counter() - started:.1f} s")
+
+
+class Progress:
+    """Filas escritas por tabla y su ritmo, para el log y la respuesta."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.rows = {table: 0 for table in TABLES}
+        self.seconds = {table: 0.0 for table in TABLES}
+        self._started = {}
+
+    def start(self, table):
+        self._started[table] = time.perf_counter()
+
+    def add(self, table, rows):
+        self.rows[table] += rows
+        self.seconds[table] = time.perf_counter() - self._started[table]
+        logger.info(
+            f"{table}: {self.rows[table]}/{self.dataset.total(table)} rows "
+            f"({self.rows[table] / max(self.seconds[table], 1e-9):.0f} rows/s)"
+        )
+
+    def summary(self):
+        return {
+            table: {
+                "rows": self.rows[table],
+                "seconds": round(self.seconds[table], 3),
+                "rows_per_sec": round(self.rows[table] / self.seconds[table]) if self.seconds[table] else 0
+            }
+            for table in TABLES if self.dataset.total(table)
+        }
+
+
+def shards(dataset, table, size):
+    """Rangos [start, stop) del dominio de `table` de como mucho `size` índices."""
+    domain = dataset.domain(table)
+    return [(start, min(start + size, domain)) for start in range(0, domain, size)]
+
+
+def _load_shard(spec, conninfo, table, start, stop, chunk_size, job_id):
+    # Se ejecuta en un proceso del pool: reconstruye el conjunto y carga su trozo
+    dataset = Dataset(**spec)
+    with psycopg.connect(conninfo) as conn:
+        return table, copy_rows(conn, table, dataset.rows(table, start, stop), chunk_size, job_id=job_id)
+
+
+def load(dataset, conninfo, chunk_size=10000, defer_indexes=False, workers=1, progress=None, job_id=None):
+    """
+    Carga `dataset` con COPY. Con `defer_indexes`, los índices secundarios
+    se crean al final, de una vez, en lugar de mantenerse fila a fila.
+
+    Con `workers` > 1, cada etapa (users, posts, comments + likes) se parte
+    en trozos que cargan a la vez procesos de un pool, cada uno con su
+    conexión; una etapa empieza cuando la anterior ha terminado, porque
+    sus filas la referencian. Con `workers` <= 1 se carga en este proceso.
+
+    Con `job_id`, cada trozo avanza ese trabajo al confirmarse, en este
+    proceso o en los del pool, y la carga se para con LoadCancelled si lo
+    cancelan.
+    """
+    progress = progress or Progress(dataset)
+    tables = [table for table in TABLES if dataset.total(table)]
+    with psycopg.connect(conninfo) as conn:
+        with deferred_indexes(conn, tables) if defer_indexes else _nothing():
+            if workers <= 1:
+                for table in tables:
+                    progress.start(table)
+                    copy_rows(conn, table, dataset.rows(table), chunk_size, progress.add, job_id)
+            else:
+                _load_parallel(dataset, conninfo, tables, chunk_size, workers, progress, job_id)
+    return progress
+
+
+def _load_parallel(dataset, conninfo, tables, chunk_size, workers, progress, job_id):
+    spec = dataset.spec()
+    # 'spawn' evita heredar hilos y conexiones del proceso de Flask
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for stage in STAGES:
+            futures = []
+            for table in (table for table in stage if table in tables):
+                progress.start(table)
+                # Unos 8 trozos por proceso, para repartir bien y dar progreso
+                size = max(1, math.ceil(dataset.domain(table) / (workers * 8)))
+                futures += [
+                    pool.submit(_load_shard, spec, conninfo, table, start, stop, chunk_size, job_id)
+                    for start, stop in shards(dataset, table, size)
+                ]
+            try:
+                for future in as_completed(futures):
+                    progress.add(*future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+@contextmanager
+def _nothing():
+    yield []
@@ -17,3 +17,28 @@ class Config:
     JWT_QUERY_STRING_NAME = 'token'
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Flask-Limiter con los contadores en Postgres, compartidos entre réplicas
+    # (RATELIMIT_SHARED=false vuelve a la memoria de cada proceso). Cada réplica
+    # sincroniza sus hits cada RATELIMIT_SYNC_INTERVAL s; ver ratelimit_storage.py
+    RATELIMIT_STORAGE_URI = (
+        SQLALCHEMY_DATABASE_URI.set(drivername='postgresql+ratelimit').render_as_string(hide_password=False)
+        if os.environ.get('RATELIMIT_SHARED', 'true').lower() == 'true' else 'memory://'
+    )
+    RATELIMIT_STORAGE_OPTIONS = {'sync_interval': float(os.environ.get('RATELIMIT_SYNC_INTERVAL', 0.25))}
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+
+    # Filas por COPY (y por commit) en la carga masiva de /bulk
+    BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 10000))
+
+    # Procesos que generan y cargan /bulk en paralelo (1 = en el hilo de la petición)
+    BULK_WORKERS = int(os.environ.get('BULK_WORKERS', os.cpu_count() or 1))
+    BULK_MAX_WORKERS = int(os.environ.get('BULK_MAX_WORKERS', 16))
+
+    # Trabajos de generación en segundo plano (ver jobs.py): hilos que los
+    # ejecutan y filas por commit. Las peticiones de /users, /posts,
+    # /comments, /likes y /bulk de más de SYNTHETIC_SYNC_MAX_COUNT filas se
+    # convierten en un trabajo, salvo con "async": false
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', 1000))
+    SYNTHETIC_SYNC_MAX_COUNT = int(os.environ.get('SYNTHETIC_SYNC_MAX_COUNT', 1000))
@@ -0,0 +1,174 @@
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from faker import Faker
+from sqlalchemy import insert
+
+from app import db
+from bulk import SYNTHETIC_PASSWORD_HASH, Dataset, LoadCancelled, conninfo_for, load
+from models import Comment, GenerationJob, Like, Post, User
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Cada función crea las filas de un trozo de un trabajo, sin commit, y
+# devuelve las creadas tal como se sirven en el stream NDJSON
+
+def _users_chunk(job, start, size, faker):
+    # El sufijo del trabajo y el índice hacen únicos username y email sin consultarlos
+    tag = job.id.hex[:6]
+    rows = []
+    for index in range(start, start + size):
+        username = f"{faker.user_name()}_{tag}_{index}"
+        rows.append({
+            "id": uuid.uuid4(),
+            "username": username,
+            "email": f"{username}@{faker.free_email_domain()}",
+            "password_hash": SYNTHETIC_PASSWORD_HASH,
+        })
+    db.session.execute(insert(User), rows)
+    return [{"id": str(row["id"]), "username": row["username"], "email": row["email"]} for row in rows]
+
+
+def _posts_chunk(job, start, size, faker):
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "content": faker.text(max_nb_chars=200),
+            "user_id": job.params["user_id"],
+            "likes_count": 0,
+            "comments_count": 0,
+        }
+        for _ in range(size)
+    ]
+    db.session.execute(insert(Post), rows)
+    return [{"id": str(row["id"]), "content": row["content"]} for row in rows]
+
+
+def _comments_chunk(job, start, size, faker):
+    contents = [faker.text(max_nb_chars=100) for _ in range(size)]
+    return [
+        {"id": str(row.id), "content": row.content}
+        for row in Comment.create_random(job.params["post_id"], contents)
+    ]
+
+
+def _likes_chunk(job, start, size, faker):
+    return [
+        {"id": str(row.id), "user_id": str(row.user_id)}
+        for row in Like.create_random(job.params["post_id"], size)
+    ]
+
+
+CHUNKS = {
+    'users': _users_chunk,
+    'posts': _posts_chunk,
+    'comments': _comments_chunk,
+    'likes': _likes_chunk,
+}
+
+
+class JobRunner:
+    """
+    Ejecuta trabajos de generation_jobs en hilos de este proceso. Cada
+    trozo de filas se confirma junto con el avance del trabajo (en bulk,
+    en la conexión del COPY de cada proceso), así que un trabajo cancelado
+    o fallido deja en la base de datos lo que indica `done`. La
+    cancelación se comprueba en cada trozo.
+
+    Un trabajo que estaba en marcha cuando se paró su proceso se queda en
+    'running' con un updated_at viejo; no se reanuda.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.chunk_size = 1000
+        self._pool = None
+
+    def configure(self, app, workers, chunk_size):
+        self.app = app
+        self.chunk_size = chunk_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generation-job')
+
+    def create(self, kind, params, total, user_id):
+        job = GenerationJob(kind=kind, params=params, total=total, user_id=user_id)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def submit(self, job):
+        """Encola `job` en segundo plano."""
+        self._pool.submit(self._run_in_background, job.id)
+
+    def _run_in_background(self, job_id):
+        with self.app.app_context():
+            try:
+                for _ in self.run(db.session.get(GenerationJob, job_id)):
+                    pass
+            finally:
+                db.session.remove()
+
+    def run(self, job):
+        """
+        Ejecuta `job` en este hilo y va devolviendo, por trozo, la lista de
+        entidades creadas (bulk no devuelve ninguna: sus ids salen de la
+        semilla). Al acabar, el trabajo queda en done, cancelled o failed.
+        """
+        if not job.start():
+            return
+        try:
+            if job.kind == 'bulk':
+                result = self._run_bulk(job)
+            else:
+                created = 0
+                for chunk in self._run_chunks(job):
+                    created += len(chunk)
+                    yield chunk
+                result = {"created": created}
+        except (JobCancelled, LoadCancelled):
+            job.finish('cancelled')
+        except GeneratorExit:
+            # El cliente del stream se ha ido: lo ya confirmado se queda
+            db.session.rollback()
+            job.finish('cancelled')
+            raise
+        except Exception as e:
+            logger.exception(f"Generation job {job.id} failed")
+            db.session.rollback()
+            job.finish('failed', error=str(e))
+        else:
+            job.finish('done', result=result)
+
+    def _run_chunks(self, job):
+        make = CHUNKS[job.kind]
+        faker = Faker()
+        start = 0
+        while start < job.total:
+            size = min(self.chunk_size, job.total - start)
+            created = make(job, start, size, faker)
+            cancelled = job.advance(len(created))
+            db.session.commit()
+            yield created
+            if cancelled:
+                raise JobCancelled()
+            if len(created) < size:
+                # Solo en likes: no quedan usuarios que no le hayan dado 'me gusta' al post
+                return
+            start += size
+
+    def _run_bulk(self, job):
+        params = dict(job.params)
+        options = {key: params.pop(key) for key in ('chunk_size', 'defer_indexes', 'workers')}
+        params['end'] = datetime.fromisoformat(params['end'])
+        dataset = Dataset(**params)
+        progress = load(dataset, conninfo_for(db.engine.url), job_id=job.id, **options)
+        return {"tables": progress.summary()}
+
+
+job_runner = JobRunner()
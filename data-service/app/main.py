@@ -5,6 +5,7 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
+import ratelimit_storage  # noqa: F401  (registra el esquema postgresql+ratelimit)
 
 # Inicialización de extensiones
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
@@ -24,6 +25,9 @@ def create_app():
     cors.init_app(app, resources={r"/*": {"origins": app.config['CORS_ORIGINS']}})
     limiter.init_app(app)
 
+    from jobs import job_runner
+    job_runner.configure(app, app.config['JOB_WORKERS'], app.config['JOB_CHUNK_SIZE'])
+
     # Registro único del blueprint de autenticación
     from synthetic_routes import synthetic_bp
     app.register_blueprint(synthetic_bp)
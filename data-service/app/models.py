@@ -1,8 +1,10 @@
 # Importaciones de terceros
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import text
 from sqlalchemy.sql import func
+import json
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 # Importaciones locales
 from app import db
 
@@ -137,6 +139,49 @@ class Comment(db.Model):
         """
         return f"<Comment {self.id} by {self.user.username} on Post {self.post.id}>"
 
+    # Cada comentario toma como autor el primer usuario con id >= un UUID
+    # aleatorio: un salto por la clave primaria, sin leer la tabla `users`
+    CREATE_RANDOM_SQL = text("""
+        WITH input AS (
+            SELECT * FROM unnest(CAST(:pivots AS uuid[]), CAST(:contents AS text[]))
+                WITH ORDINALITY AS i(pivot, content, ord)
+        ), inserted AS (
+            INSERT INTO comments (id, content, timestamp, user_id, post_id)
+            SELECT gen_random_uuid(), i.content, clock_timestamp(),
+                   COALESCE(
+                       (SELECT id FROM users WHERE id >= i.pivot ORDER BY id LIMIT 1),
+                       (SELECT id FROM users ORDER BY id LIMIT 1)
+                   ),
+                   :post_id
+            FROM input i
+            ORDER BY i.ord
+            RETURNING id, content
+        ), updated AS (
+            UPDATE posts
+            SET comments_count = COALESCE(comments_count, 0) + (SELECT count(*) FROM inserted)
+            WHERE id = :post_id
+        )
+        SELECT id, content FROM inserted
+    """)
+
+    @classmethod
+    def create_random(cls, post_id, contents):
+        """
+        Crea un comentario por contenido en un post, de autores aleatorios.
+
+        Args:
+            post_id (UUID): ID del post.
+            contents (list): Textos de los comentarios.
+
+        Returns:
+            list: Filas (id, content) creadas.
+        """
+        return db.session.execute(cls.CREATE_RANDOM_SQL, {
+            "post_id": post_id,
+            "pivots": [uuid.uuid4() for _ in contents],
+            "contents": contents,
+        }).all()
+
 
 class Like(db.Model):
     """
@@ -167,6 +212,187 @@ class Like(db.Model):
         """
         return f"<Like by {self.user.username} on Post {self.post.id}>"
 
+    # Candidatos por saltos aleatorios en la clave primaria de `users`; el
+    # anti-join contra `likes` usa el índice único (user_id, post_id)
+    CREATE_RANDOM_SQL = text("""
+        WITH candidates AS (
+            SELECT DISTINCT u.id
+            FROM unnest(CAST(:pivots AS uuid[])) AS r(pivot)
+            CROSS JOIN LATERAL (
+                SELECT id FROM users WHERE id >= r.pivot ORDER BY id LIMIT 1
+            ) u
+        )
+        INSERT INTO likes (id, user_id, post_id)
+        SELECT gen_random_uuid(), c.id, :post_id
+        FROM candidates c
+        WHERE NOT EXISTS (SELECT 1 FROM likes l WHERE l.user_id = c.id AND l.post_id = :post_id)
+        LIMIT :count
+        ON CONFLICT ON CONSTRAINT _user_post_uc DO NOTHING
+        RETURNING id, user_id
+    """)
+
+    # Si los saltos aleatorios no bastan (quedan pocos usuarios sin 'me gusta'
+    # y caen tras huecos pequeños de ids), se eligen entre todos los que faltan
+    CREATE_REMAINING_SQL = text("""
+        INSERT INTO likes (id, user_id, post_id)
+        SELECT gen_random_uuid(), u.id, :post_id
+        FROM users u
+        WHERE NOT EXISTS (SELECT 1 FROM likes l WHERE l.post_id = :post_id AND l.user_id = u.id)
+        ORDER BY random()
+        LIMIT :count
+        ON CONFLICT ON CONSTRAINT _user_post_uc DO NOTHING
+        RETURNING id, user_id
+    """)
+
+    @classmethod
+    def create_random(cls, post_id, count, rounds=5):
+        """
+        Da hasta `count` 'me gusta' a un post de usuarios aleatorios que aún
+        no se lo han dado, y suma los creados a posts.likes_count.
+
+        El coste depende de `count`, no del tamaño de `users` ni de `likes`,
+        salvo cuando tras `rounds` intentos faltan 'me gusta' (casi todos
+        los usuarios se lo han dado ya): entonces los que faltan se eligen
+        recorriendo `users`, y solo se crean menos de `count` si no quedan
+        usuarios sin dar 'me gusta' al post.
+
+        Args:
+            post_id (UUID): ID del post.
+            count (int): Número de 'me gusta' a crear.
+            rounds (int): Intentos con candidatos nuevos.
+
+        Returns:
+            list: Filas (id, user_id) creadas.
+        """
+        created = []
+        for _ in range(rounds):
+            remaining = count - len(created)
+            if remaining <= 0:
+                break
+            # Se piden el doble de candidatos: algunos ya habrán dado 'me gusta' o se repetirán
+            created += db.session.execute(cls.CREATE_RANDOM_SQL, {
+                "post_id": post_id,
+                "pivots": [uuid.uuid4() for _ in range(remaining * 2)],
+                "count": remaining,
+            }).all()
+
+        remaining = count - len(created)
+        if remaining > 0:
+            created += db.session.execute(cls.CREATE_REMAINING_SQL, {"post_id": post_id, "count": remaining}).all()
+
+        if created:
+            db.session.execute(
+                text("UPDATE posts SET likes_count = COALESCE(likes_count, 0) + :n WHERE id = :post_id"),
+                {"n": len(created), "post_id": post_id}
+            )
+        return created
+
+
+class GenerationJob(db.Model):
+    """
+    Trabajo de generación en segundo plano (ver jobs.py). `done` avanza en
+    la misma transacción que cada trozo de filas, así que cuenta justo lo
+    que ya está en la base de datos.
+
+    Estados: pending -> running -> done | failed | cancelled. Cancelar un
+    trabajo en marcha lo pasa a 'cancelling' y el proceso que lo ejecuta
+    lo deja en 'cancelled' al acabar el trozo en curso.
+    """
+    __tablename__ = 'generation_jobs'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = db.Column(db.String(16), nullable=False)
+    params = db.Column(JSONB, nullable=False)
+    user_id = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending', index=True)
+    total = db.Column(db.Integer, nullable=False)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(JSONB)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    START_SQL = text("""
+        UPDATE generation_jobs SET status = 'running', updated_at = now()
+        WHERE id = :id AND status = 'pending'
+        RETURNING id
+    """)
+
+    FINISH_SQL = text("""
+        UPDATE generation_jobs
+        SET status = :status, result = CAST(:result AS jsonb), error = :error,
+            finished_at = now(), updated_at = now()
+        WHERE id = :id
+    """)
+
+    ADVANCE_SQL = text("""
+        UPDATE generation_jobs SET done = done + :n, updated_at = now()
+        WHERE id = :id
+        RETURNING status
+    """)
+
+    CANCEL_SQL = text("""
+        UPDATE generation_jobs
+        SET status = CASE status WHEN 'pending' THEN 'cancelled' ELSE 'cancelling' END,
+            finished_at = CASE status WHEN 'pending' THEN now() END,
+            updated_at = now()
+        WHERE id = :id AND status IN ('pending', 'running')
+        RETURNING status
+    """)
+
+    def start(self):
+        """
+        Pasa el trabajo a 'running' si sigue pendiente.
+
+        Returns:
+            bool: False si lo cancelaron antes de empezar.
+        """
+        started = db.session.execute(self.START_SQL, {"id": self.id}).first() is not None
+        db.session.commit()
+        return started
+
+    def finish(self, status, result=None, error=None):
+        """Deja el trabajo en su estado final ('done', 'cancelled' o 'failed')."""
+        db.session.execute(self.FINISH_SQL, {
+            "id": self.id, "status": status, "result": json.dumps(result) if result is not None else None, "error": error
+        })
+        db.session.commit()
+
+    def advance(self, rows):
+        """
+        Suma `rows` al progreso, sin commit: va en la transacción del trozo.
+
+        Returns:
+            bool: True si han pedido cancelar el trabajo.
+        """
+        return db.session.execute(self.ADVANCE_SQL, {"id": self.id, "n": rows}).scalar() == 'cancelling'
+
+    @classmethod
+    def cancel(cls, job_id):
+        """
+        Cancela un trabajo pendiente o pide parar uno en marcha.
+
+        Returns:
+            str: Nuevo estado, o None si el trabajo ya había terminado.
+        """
+        return db.session.execute(cls.CANCEL_SQL, {"id": job_id}).scalar()
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "kind": self.kind,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
 # -------------------------------------------------------------------
 # FIN DE LOS MODELOS
 # -------------------------------------------------------------------
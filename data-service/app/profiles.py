@@ -0,0 +1,102 @@
+import math
+
+# Perfiles de generación de /bulk. Con exponente 0 la distribución es uniforme.
+#   post_skew: Zipf de likes y comentarios por post (unos pocos posts muy calientes)
+#   user_skew: Zipf de la actividad por usuario (autores, likers y comentaristas)
+#   burst_fraction / bursts / burst_hours: parte de los posts que cae en
+#     `bursts` ráfagas de ±`burst_hours` horas; el resto se reparte uniforme
+#   comment_delay_hours: retraso medio (exponencial) de un comentario
+#     respecto a su post; None = uniforme hasta `end`
+PROFILES = {
+    'uniform': {
+        'post_skew': 0.0, 'user_skew': 0.0,
+        'burst_fraction': 0.0, 'bursts': 0, 'burst_hours': 0.0,
+        'comment_delay_hours': None,
+    },
+    'skewed': {
+        'post_skew': 1.1, 'user_skew': 1.0,
+        'burst_fraction': 0.6, 'bursts': 12, 'burst_hours': 3.0,
+        'comment_delay_hours': 6.0,
+    },
+}
+
+# Términos de la suma de Zipf que se calculan uno a uno; el resto se aproxima con la integral
+EXACT_TERMS = 10000
+
+
+def resolve_profile(value):
+    """
+    Acepta None, el nombre de un perfil o un dict {'name': ..., <parámetros>}
+    que sobrescribe los del perfil base, y devuelve los parámetros completos.
+    """
+    if value is None:
+        value = 'uniform'
+    if isinstance(value, str):
+        value = {'name': value}
+    if not isinstance(value, dict):
+        raise ValueError("profile debe ser un nombre o un objeto")
+
+    name = value.get('name', 'uniform')
+    if name not in PROFILES:
+        raise ValueError(f"Perfil desconocido: {name}")
+    unknown = set(value) - set(PROFILES[name]) - {'name'}
+    if unknown:
+        raise ValueError(f"Parámetros de perfil desconocidos: {', '.join(sorted(unknown))}")
+
+    profile = {**PROFILES[name], **{key: val for key, val in value.items() if key != 'name'}}
+    for key in ('post_skew', 'user_skew', 'burst_fraction', 'burst_hours'):
+        profile[key] = float(profile[key])
+    profile['bursts'] = int(profile['bursts'])
+    if profile['comment_delay_hours'] is not None:
+        profile['comment_delay_hours'] = float(profile['comment_delay_hours'])
+    if min(profile['post_skew'], profile['user_skew'], profile['burst_hours'], profile['bursts']) < 0:
+        raise ValueError("Los parámetros del perfil no pueden ser negativos")
+    if not 0 <= profile['burst_fraction'] <= 1:
+        raise ValueError("burst_fraction debe estar entre 0 y 1")
+    profile['name'] = name
+    return profile
+
+
+def zipf_norm(n, s):
+    """Suma de k^-s para k = 1..n (exacta en los primeros términos, integral en la cola)."""
+    exact = min(n, EXACT_TERMS)
+    total = math.fsum(k ** -s for k in range(1, exact + 1))
+    if n > exact:
+        a, b = exact + 0.5, n + 0.5
+        total += math.log(b / a) if s == 1 else (b ** (1 - s) - a ** (1 - s)) / (1 - s)
+    return total
+
+
+def zipf_weight(rank, s, norm):
+    """Fracción del total que corresponde al rango `rank` (0 = el más popular)."""
+    return (rank + 1) ** -s / norm
+
+
+def zipf_rank(n, s, u):
+    """
+    Rango en [0, n) con probabilidad ~ (rango + 1)^-s para u uniforme en
+    [0, 1): inversa de la distribución de Pareto acotada, en O(1).
+    """
+    if s == 1:
+        x = (n + 1) ** u
+    else:
+        x = (((n + 1) ** (1 - s) - 1) * u + 1) ** (1 / (1 - s))
+    return min(max(int(x) - 1, 0), n - 1)
+
+
+class AffinePermutation:
+    """
+    Permutación i -> (a·i + b) mod n, para repartir los rangos de Zipf por
+    los índices: el post o usuario más popular no es siempre el 0.
+    """
+
+    def __init__(self, n, a, b):
+        self.n = n
+        a = a % n or 1
+        while math.gcd(a, n) != 1:
+            a += 1
+        self.a = a
+        self.b = b % n
+
+    def __call__(self, i):
+        return (self.a * i + self.b) % self.n
@@ -1,9 +1,12 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User, Post, Comment, Like
+from models import User, Post, Comment, Like, GenerationJob
 from app import db
+from bulk import TABLES, Dataset, conninfo_for, load
+from jobs import job_runner
+from datetime import datetime
 from faker import Faker
-import random
 
 # Crear instancia de Faker
 faker = Faker()
@@ -11,11 +14,61 @@ faker = Faker()
 # Crear Blueprint
 synthetic_bp = Blueprint('synthetic', __name__)
 
+NDJSON = 'application/x-ndjson'
+
+
+def _wants_stream():
+    return request.accept_mimetypes.best == NDJSON
+
+
+def _as_job(count):
+    # En segundo plano si se pide, si se quiere el stream o si count es grande,
+    # salvo que se pida explícitamente en la petición con "async": false
+    data = request.json or {}
+    if data.get('async') is not None:
+        return bool(data['async'])
+    return _wants_stream() or count > current_app.config['SYNTHETIC_SYNC_MAX_COUNT']
+
+
+def _start_job(kind, params, total):
+    """
+    Crea el trabajo y, con Accept: application/x-ndjson, lo ejecuta en esta
+    petición devolviendo una línea por entidad creada y una final con el
+    trabajo; si no, lo encola y responde 202 con su id.
+    """
+    job = job_runner.create(kind, params, total, str(get_jwt_identity()))
+    status_url = url_for('synthetic.get_job', job_id=job.id)
+
+    if _wants_stream() and kind != 'bulk':
+        def lines():
+            for chunk in job_runner.run(job):
+                yield ''.join(json.dumps(entity) + '\n' for entity in chunk)
+            db.session.refresh(job)
+            yield json.dumps({"job": job.to_dict()}) + '\n'
+
+        return Response(stream_with_context(lines()), mimetype=NDJSON, headers={"X-Job-Id": str(job.id)})
+
+    job_runner.submit(job)
+    return jsonify({
+        "job_id": str(job.id),
+        "status": job.status,
+        "total": total,
+        "status_url": status_url
+    }), 202, {"Location": status_url}
+
+
+def _own_job(job_id):
+    job = db.session.get(GenerationJob, job_id)
+    return job if job and job.user_id == str(get_jwt_identity()) else None
+
+
 # Ruta para generar usuarios sintéticos (PROTEGIDA)
 @synthetic_bp.route('/users', methods=['POST'])
 @jwt_required()
 def generate_users():
     count = int(request.json.get('count', 10))  # Cantidad de usuarios a generar (por defecto 10)
+    if _as_job(count):
+        return _start_job('users', {}, count)
     users = []
 
     for _ in range(count):
@@ -43,6 +96,8 @@ def generate_posts():
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "Usuario no encontrado"}), 404
+    if _as_job(count):
+        return _start_job('posts', {"user_id": str(user.id)}, count)
 
     posts = []
     for _ in range(count):
@@ -71,21 +126,14 @@ def generate_comments():
     post = Post.query.get(post_id)
     if not post:
         return jsonify({"error": "Post no encontrado"}), 404
+    if _as_job(count):
+        return _start_job('comments', {"post_id": str(post.id)}, count)
 
-    comments = []
-    for _ in range(count):
-        user = random.choice(User.query.all())
-        comment = Comment(
-            content=faker.text(max_nb_chars=100),
-            user_id=user.id,
-            post_id=post.id
-        )
-        comments.append(comment)
-        db.session.add(comment)
+    comments = Comment.create_random(post.id, [faker.text(max_nb_chars=100) for _ in range(count)])
     db.session.commit()
 
     return jsonify({
-        "message": f"Se generaron {count} comentarios sintéticos para el post {post.id}.",
+        "message": f"Se generaron {len(comments)} comentarios sintéticos para el post {post.id}.",
         "comments": [{"id": str(comment.id), "content": comment.content} for comment in comments]
     }), 201
 
@@ -98,33 +146,86 @@ def generate_likes():
     post = Post.query.get(post_id)
     if not post:
         return jsonify({"error": "Post no encontrado"}), 404
+    if _as_job(count):
+        return _start_job('likes', {"post_id": str(post.id)}, count)
 
-    existing_user_ids = {like.user_id for like in post.likes}
-    all_user_ids = {user.id for user in User.query.all()}
-    available_user_ids = list(all_user_ids - existing_user_ids)
-
-    if not available_user_ids:
+    likes = Like.create_random(post.id, count)
+    if not likes:
+        db.session.rollback()
         return jsonify({"error": "No hay más usuarios disponibles para dar likes en este post."}), 400
 
-    likes_to_create = min(count, len(available_user_ids))
-    selected_user_ids = random.sample(available_user_ids, likes_to_create)
-
-    likes = []
-    for user_id in selected_user_ids:
-        like = Like(
-            user_id=user_id,
-            post_id=post.id
-        )
-        likes.append(like)
-        db.session.add(like)
-
-    # Actualizar el contador de likes
-    post.likes_count += len(likes)
-    db.session.add(post)  # Asegurarse de añadir el post a la sesión si no está ya incluido
-
     db.session.commit()
 
     return jsonify({
         "message": f"Se generaron {len(likes)} likes sintéticos para el post {post.id}.",
         "likes": [{"id": str(like.id), "user_id": str(like.user_id)} for like in likes]
     }), 201
+
+# Ruta para cargar un conjunto sintético completo con COPY (PROTEGIDA)
+@synthetic_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def generate_bulk():
+    data = request.json or {}
+    try:
+        dataset = Dataset(
+            users=int(data.get('users', 0)),
+            posts=int(data.get('posts', 0)),
+            comments=int(data.get('comments', 0)),
+            likes=int(data.get('likes', 0)),
+            seed=int(data['seed']) if data.get('seed') is not None else None,
+            days=int(data.get('days', 30)),
+            end=datetime.fromisoformat(data['end']) if data.get('end') else None,
+            profile=data.get('profile')
+        )
+        chunk_size = int(data.get('chunk_size', current_app.config['BULK_CHUNK_SIZE']))
+        workers = int(data.get('workers', current_app.config['BULK_WORKERS']))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size debe ser positivo"}), 400
+    if dataset.end.tzinfo is None:
+        return jsonify({"error": "end debe incluir la zona horaria"}), 400
+
+    options = dict(
+        chunk_size=chunk_size,
+        defer_indexes=bool(data.get('defer_indexes', False)),
+        workers=min(workers, current_app.config['BULK_MAX_WORKERS'])
+    )
+    total = sum(dataset.total(table) for table in TABLES)
+    if _as_job(total):
+        # Los ids no se devuelven: salen de la semilla
+        spec = dataset.spec()
+        return _start_job('bulk', {**spec, "end": spec['end'].isoformat(), **options}, total)
+
+    # Misma semilla, tamaños, days, end y perfil => mismo conjunto, con cualquier número de workers
+    progress = load(dataset, conninfo_for(db.engine.url), **options)
+
+    return jsonify({
+        "message": "Se cargó el conjunto sintético.",
+        "seed": dataset.seed,
+        "end": dataset.end.isoformat(),
+        "days": dataset.days,
+        "profile": dataset.profile,
+        "tables": progress.summary()
+    }), 201
+
+# Estado de un trabajo de generación (PROTEGIDA)
+@synthetic_bp.route('/jobs/<uuid:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = _own_job(job_id)
+    if not job:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(job.to_dict()), 200
+
+# Cancelar un trabajo de generación (PROTEGIDA): lo ya confirmado se queda
+@synthetic_bp.route('/jobs/<uuid:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_job(job_id):
+    if not _own_job(job_id):
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    status = GenerationJob.cancel(job_id)
+    db.session.commit()
+    if status is None:
+        return jsonify({"error": "El trabajo ya había terminado"}), 409
+    return jsonify({"id": str(job_id), "status": status}), 202
@@ -0,0 +1,61 @@
+"""
+Rendimiento de la carga masiva de datos sintéticos, en filas/s por tabla.
+
+Primero mide solo la generación (Dataset.rows, sin base de datos) y, si
+hay DATABASE_URL, la carga completa con COPY: en un proceso sin y con
+índices diferidos, y con --workers procesos. --profile elige el reparto
+(uniform o skewed, ver app/profiles.py). Cada carga usa una semilla
+nueva, así que se puede repetir sobre la misma base de datos.
+
+Uso (desde data-service/):
+    python benchmarks/bench_bulk_load.py --users 100000 --posts 200000 --likes 2000000 --workers 8 --profile skewed
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from bulk import TABLES, Dataset, conninfo_for, load  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--likes', type=int, default=500000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='uniform')
+    args = parser.parse_args()
+    sizes = dict(users=args.users, posts=args.posts, comments=args.comments, likes=args.likes, profile=args.profile)
+
+    print("Generación (sin base de datos)")
+    dataset = Dataset(**sizes)
+    for table in TABLES:
+        start = time.perf_counter()
+        rows = sum(1 for _ in dataset.rows(table))
+        elapsed = time.perf_counter() - start
+        print(f"  {table:9} {rows:10d} filas   {rows / elapsed:10.0f} filas/s")
+
+    if not os.environ.get('DATABASE_URL'):
+        print("Sin DATABASE_URL: no se mide la carga")
+        return
+
+    conninfo = conninfo_for(make_url(os.environ['DATABASE_URL']))
+    for workers, defer_indexes in ((1, False), (1, True), (args.workers, True)):
+        print(f"Carga con COPY en trozos de {args.chunk_size} (workers={workers}, defer_indexes={defer_indexes})")
+        start = time.perf_counter()
+        summary = load(Dataset(**sizes), conninfo, args.chunk_size, defer_indexes, workers).summary()
+        for table, stats in summary.items():
+            print(f"  {table:9} {stats['rows']:10d} filas   {stats['rows_per_sec']:10d} filas/s")
+        print(f"  total {time.perf_counter() - start:.1f} s (incluye recrear índices)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import uuid
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from .liked import MAX_LOOKUP_POSTS, liked_post_ids
+
+likes = Blueprint('likes', __name__, url_prefix='/likes')
+
+
+@likes.route('/liked_by_me', methods=['GET'])
+@jwt_required()
+def get_liked_by_me():
+    """
+    ?post_ids=id1,id2,... -> {"liked": [ids a los que el usuario dio 'me gusta']}
+    para los posts visibles, en una sola consulta.
+    """
+    raw = [post_id for post_id in request.args.get('post_ids', '').split(',') if post_id]
+    if len(raw) > MAX_LOOKUP_POSTS:
+        return jsonify({"msg": f"Como máximo {MAX_LOOKUP_POSTS} post_ids."}), 400
+    try:
+        post_ids = [uuid.UUID(post_id, version=4) for post_id in raw]
+    except ValueError:
+        return jsonify({"msg": "Post ID inválido. Debe ser un UUID válido."}), 400
+
+    liked = liked_post_ids(get_jwt_identity(), post_ids)
+    return jsonify({"liked": [str(post_id) for post_id in post_ids if post_id in liked]}), 200
@@ -0,0 +1,145 @@
+import logging
+import threading
+
+from sqlalchemy import text
+
+from .extensions import db, socketio
+
+logger = logging.getLogger(__name__)
+
+# Canal que escucha post-service para invalidar su caché del feed
+FEED_CHANNEL = 'feed_changed'
+
+
+def post_room(post_id):
+    return f"post:{post_id}"
+
+
+class CounterCoalescer:
+    """
+    Agrupa los cambios de contadores por post y emite como mucho un
+    `update_likes` por post y ventana (`window`, en segundos). Como el valor
+    es el contador absoluto, basta con quedarse con el último de la ventana.
+
+    Con `window` <= 0 cada cambio se emite inmediatamente.
+    """
+
+    def __init__(self, event='update_likes', field='likes_count', window=0.25):
+        self.event = event
+        self.field = field
+        self.window = window
+        self.received = 0
+        self.emitted = 0
+        self.flushes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def configure(self, window):
+        with self._lock:
+            self.window = window
+
+    def add(self, post_id, value):
+        post_id = str(post_id)
+        with self._lock:
+            self.received += 1
+            if self.window > 0:
+                self._pending[post_id] = value
+                if self._task is None:
+                    self._task = socketio.start_background_task(self._run)
+                return
+            self.emitted += 1
+        self._emit(post_id, value)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self.emitted += len(pending)
+            if pending:
+                self.flushes += 1
+        for post_id, value in pending.items():
+            self._emit(post_id, value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'window_ms': int(self.window * 1000),
+                'received': self.received,
+                'emitted': self.emitted,
+                'flushes': self.flushes,
+                'pending': len(self._pending),
+            }
+
+    def _emit(self, post_id, value):
+        socketio.emit(self.event, {'post_id': post_id, self.field: value}, to=post_room(post_id))
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.window or 0.25)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing {self.event}: {str(e)}")
+
+
+like_broadcaster = CounterCoalescer()
+
+
+class FeedNotifier:
+    """
+    Avisa a post-service de los posts cuyos likes o comentarios han cambiado
+    con un NOTIFY por post y ventana (`window`, en segundos), enviados desde
+    una transacción propia y no desde la del usuario: al hacer commit, una
+    transacción con NOTIFY toma un bloqueo global de la base de datos, y con
+    uno por like los likes de un post caliente volverían a ir de uno en uno.
+
+    Las páginas del feed que contienen el post se quedan como mucho una
+    ventana desfasadas; si un envío falla, caducan con FEED_CACHE_TTL.
+    """
+
+    def __init__(self, window=1.0):
+        self.app = None
+        self.window = window
+        self.received = 0
+        self.sent = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def configure(self, app, window):
+        with self._lock:
+            self.app = app
+            self.window = window
+
+    def add(self, post_id):
+        with self._lock:
+            self.received += 1
+            self._pending.add(str(post_id))
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                for post_id in pending:
+                    conn.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": FEED_CHANNEL, "payload": post_id}
+                    )
+        with self._lock:
+            self.sent += len(pending)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error notifying {FEED_CHANNEL}: {str(e)}")
+
+
+feed_notifier = FeedNotifier()
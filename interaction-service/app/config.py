@@ -17,3 +17,58 @@ class Config:
     JWT_QUERY_STRING_NAME = 'token'
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Ventana de agrupación de update_likes por post (0 = emitir cada cambio)
+    LIKES_BROADCAST_WINDOW = float(os.environ.get('LIKES_BROADCAST_WINDOW_MS', 250)) / 1000
+
+    # Ventana de los avisos feed_changed a post-service: un NOTIFY por post y ventana
+    FEED_NOTIFY_WINDOW = float(os.environ.get('FEED_NOTIFY_WINDOW_MS', 1000)) / 1000
+
+    # Ventana de los likes y comentarios recibidos que se suman a user_stats de los autores
+    USER_STATS_FLUSH_WINDOW = float(os.environ.get('USER_STATS_FLUSH_WINDOW_MS', 1000)) / 1000
+
+    # Bus de Socket.IO entre réplicas sobre LISTEN/NOTIFY de Postgres
+    SOCKETIO_PG_QUEUE = os.environ.get('SOCKETIO_PG_QUEUE', 'true').lower() == 'true'
+    SOCKETIO_PG_CHANNEL = os.environ.get('SOCKETIO_PG_CHANNEL', 'socketio')
+    SOCKETIO_PG_BATCH_WINDOW = float(os.environ.get('SOCKETIO_PG_BATCH_WINDOW_MS', 10)) / 1000
+
+    # Segundos que un socket con el token caducado tiene para enviar 'reauth'
+    SOCKET_REAUTH_GRACE = float(os.environ.get('SOCKET_REAUTH_GRACE', 60))
+
+    # Token bucket por socket para eventos de Socket.IO: evento:eventos_por_segundo:ráfaga.
+    # El límite por usuario (todas sus conexiones) es SOCKET_USER_LIMIT_FACTOR veces el del socket
+    SOCKET_EVENT_LIMITS = os.environ.get(
+        'SOCKET_EVENT_LIMITS',
+        'like_post:5:10,like:5:10,unlike:5:10,comment_post:0.5:5,join_posts:5:20,leave_posts:5:20,reauth:0.2:3'
+    )
+    SOCKET_USER_LIMIT_FACTOR = float(os.environ.get('SOCKET_USER_LIMIT_FACTOR', 2))
+
+    # Deduplicación de eventos con op_id: caché en memoria y tabla operations
+    OP_CACHE_MAX_ENTRIES = int(os.environ.get('OP_CACHE_MAX_ENTRIES', 50000))
+    OP_CACHE_TTL = float(os.environ.get('OP_CACHE_TTL', 300))
+    OP_DB_TTL = float(os.environ.get('OP_DB_TTL', 86400))
+
+    # Caché por usuario de los posts que le gustan (GET /likes/liked_by_me)
+    LIKED_CACHE_TTL = float(os.environ.get('LIKED_CACHE_TTL', 15))
+    LIKED_CACHE_MAX_USERS = int(os.environ.get('LIKED_CACHE_MAX_USERS', 10000))
+
+    # Escritura diferida de likes y comentarios por lotes (un commit por lote).
+    # WRITE_BEHIND_DURABILITY: 'strict' o 'relaxed' (synchronous_commit=off)
+    WRITE_BEHIND = os.environ.get('WRITE_BEHIND', 'false').lower() == 'true'
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+    WRITE_BEHIND_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL_MS', 20)) / 1000
+    WRITE_BEHIND_MAX_QUEUE = int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', 10000))
+    WRITE_BEHIND_DURABILITY = os.environ.get('WRITE_BEHIND_DURABILITY', 'strict')
+
+    # 'threading' para desarrollo; wsgi.py lo fija a 'gevent' en producción
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
+
+    # Pool de conexiones por proceso: con gevent todos los greenlets del worker
+    # comparten este pool, así que limita las transacciones concurrentes a Postgres
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
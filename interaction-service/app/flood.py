@@ -0,0 +1,141 @@
+import functools
+import threading
+import time
+
+from flask import request
+from flask_socketio import emit
+
+from .sessions import socket_sessions
+
+
+def parse_limits(spec):
+    """
+    Convierte 'like_post:5:10,comment_post:0.5:3' en
+    {'like_post': (5.0, 10.0), 'comment_post': (0.5, 3.0)}: eventos por
+    segundo y ráfaga máxima de cada tipo de evento.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        event, rate, burst = item.split(':')
+        limits[event] = (float(rate), float(burst))
+    return limits
+
+
+class EventLimiter:
+    """
+    Token bucket en memoria por socket (`sid`) y por usuario para los eventos
+    de Socket.IO, que Flask-Limiter no cubre. Cada tipo de evento tiene su
+    ritmo y su ráfaga; el límite por usuario es `user_factor` veces el del
+    socket, para permitir varias pestañas. Un evento que excede cualquiera de
+    los dos se descarta antes de tocar la base de datos.
+
+    Al cliente se le avisa con 'rate_limited' como mucho una vez por socket
+    y evento en cada intervalo de recarga (1 / ritmo), y solo desde esta
+    réplica: el socket es local, no hace falta pasar por la cola.
+    """
+
+    def __init__(self, limits=None, user_factor=2, max_buckets=100000):
+        self.limits = limits or {}
+        self.user_factor = user_factor
+        self.max_buckets = max_buckets
+        self.dropped = {}
+        self.allowed = 0
+        self._buckets = {}
+        self._notices = {}
+        self._lock = threading.Lock()
+
+    def configure(self, limits, user_factor):
+        with self._lock:
+            self.limits = limits
+            self.user_factor = user_factor
+            self._buckets.clear()
+            self._notices.clear()
+
+    def hit(self, event, sid, user_id=None, now=None):
+        """Consume un token; devuelve None si se permite o el ámbito ('sid'/'user') que lo rechaza."""
+        limit = self.limits.get(event)
+        if limit is None:
+            return None
+        rate, burst = limit
+        now = now or time.monotonic()
+
+        with self._lock:
+            keys = [('sid', sid, rate, burst)]
+            if user_id is not None:
+                keys.append(('user', user_id, rate * self.user_factor, burst * self.user_factor))
+
+            updates = []
+            for scope, owner, scope_rate, scope_burst in keys:
+                owner_buckets = self._buckets.setdefault((scope, owner), {})
+                tokens, last = owner_buckets.get(event, (scope_burst, now))
+                tokens = min(scope_burst, tokens + (now - last) * scope_rate)
+                if tokens < 1:
+                    owner_buckets[event] = (tokens, now)
+                    self.dropped[(event, scope)] = self.dropped.get((event, scope), 0) + 1
+                    return scope
+                updates.append((owner_buckets, tokens))
+
+            for owner_buckets, tokens in updates:
+                owner_buckets[event] = (tokens - 1, now)
+            self.allowed += 1
+
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+        return None
+
+    def should_notify(self, event, sid, now=None):
+        """True si hay que avisar a `sid` de un rechazo de `event` (uno por intervalo de recarga)."""
+        rate, _ = self.limits[event]
+        now = now or time.monotonic()
+        with self._lock:
+            last = self._notices.get((sid, event))
+            if last is not None and now - last < 1 / rate:
+                return False
+            self._notices[(sid, event)] = now
+            return True
+
+    def forget(self, sid):
+        with self._lock:
+            self._buckets.pop(('sid', sid), None)
+            for key in [key for key in self._notices if key[0] == sid]:
+                del self._notices[key]
+
+    def stats(self):
+        with self._lock:
+            dropped = {}
+            for (event, scope), count in self.dropped.items():
+                dropped.setdefault(event, {})[scope] = count
+            return {'allowed': self.allowed, 'dropped': dropped, 'buckets': len(self._buckets)}
+
+    def limit(self, event):
+        """Decorador para manejadores de Socket.IO."""
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                session = socket_sessions.get(request.sid)
+                scope = self.hit(event, request.sid, session[0] if session else None)
+                if scope is not None:
+                    if self.should_notify(event, request.sid):
+                        emit('rate_limited', {'event': event, 'scope': scope}, to=request.sid, ignore_queue=True)
+                    return None
+                return handler(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _prune(self, now):
+        # Un bucket que ya se habría rellenado del todo equivale a no tenerlo
+        factors = {'sid': 1, 'user': self.user_factor}
+        for key, owner_buckets in list(self._buckets.items()):
+            factor = factors[key[0]]
+            for event, (tokens, last) in list(owner_buckets.items()):
+                rate, burst = self.limits[event]
+                if tokens + (now - last) * rate * factor >= burst * factor:
+                    del owner_buckets[event]
+            if not owner_buckets:
+                del self._buckets[key]
+        for (sid, event), last in list(self._notices.items()):
+            if now - last >= 1 / self.limits[event][0]:
+                del self._notices[(sid, event)]
+
+
+event_limiter = EventLimiter()
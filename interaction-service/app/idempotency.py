@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .extensions import db, socketio
+from .models import Operation
+
+logger = logging.getLogger(__name__)
+
+# Espacio de nombres para derivar el ID de un comentario de su op_id
+COMMENT_NAMESPACE = uuid.UUID('6f1c2b8e-4d0a-4c39-9b0e-2a7d5e3f8c41')
+
+
+def validate_op_id(op_id):
+    """op_id opcional: una cadena de 1 a 64 caracteres elegida por el cliente."""
+    if op_id is None:
+        return None
+    if not isinstance(op_id, str) or not 1 <= len(op_id) <= 64:
+        raise ValueError('op_id inválido')
+    return op_id
+
+
+def comment_id_for(user_id, op_id):
+    # Un reintento del mismo comentario tiene siempre el mismo ID
+    return uuid.uuid5(COMMENT_NAMESPACE, f"{user_id}:{op_id}")
+
+
+class OpCache:
+    """
+    Caché LRU/TTL en memoria de las respuestas a operaciones con `op_id`,
+    para contestar a un reintento sin ir a la base de datos. Es solo la vía
+    rápida: la garantía la da la tabla `operations` (Operation.claim), que
+    también cubre reintentos llegados a otra réplica o tras un reinicio.
+
+    Una tarea en segundo plano borra de `operations` las filas más antiguas
+    que `db_ttl` segundos.
+    """
+
+    def __init__(self, max_entries=50000, ttl=300, db_ttl=86400, purge_interval=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_ttl = db_ttl
+        self.purge_interval = purge_interval
+        self.hits = 0
+        self._app = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def configure(self, app, max_entries, ttl, db_ttl):
+        with self._lock:
+            self._app = app
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self.db_ttl = db_ttl
+            self._entries.clear()
+
+    def get(self, user_id, kind, op_id):
+        key = (str(user_id), kind, op_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, user_id, kind, op_id, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(str(user_id), kind, op_id)] = (time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._task is None and self._app is not None:
+                self._task = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.purge_interval)
+            try:
+                with self._app.app_context():
+                    with db.session.begin():
+                        purged = Operation.purge(self.db_ttl)
+                    db.session.remove()
+                logger.info(f"Purged {purged} old operations")
+            except Exception as e:
+                logger.error(f"Error purging operations: {str(e)}")
+
+
+op_cache = OpCache()
@@ -0,0 +1,98 @@
+import threading
+import time
+import uuid
+
+from sqlalchemy import text
+
+from .extensions import db
+
+# Máximo de posts por consulta (una página del feed son 20–50)
+MAX_LOOKUP_POSTS = 100
+
+LIKED_SQL = text("""
+    SELECT post_id FROM likes
+    WHERE user_id = :user_id AND post_id = ANY(CAST(:post_ids AS uuid[]))
+""")
+
+
+class LikedCache:
+    """
+    Caché por usuario, de vida corta, de qué posts le gustan. Guarda tanto
+    los positivos como los negativos, y los toggles de esta réplica la
+    actualizan en el momento; los de otras réplicas se ven al caducar
+    (`ttl` segundos desde que se cargó el usuario).
+    """
+
+    def __init__(self, ttl=15, max_users=10000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def configure(self, ttl, max_users):
+        with self._lock:
+            self.ttl = ttl
+            self.max_users = max_users
+            self._users.clear()
+
+    def lookup(self, user_id, post_ids):
+        """Devuelve ({post_id: liked} conocidos, [post_ids que faltan])."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] < now:
+                return {}, list(post_ids)
+            known = entry[1]
+        return (
+            {post_id: known[post_id] for post_id in post_ids if post_id in known},
+            [post_id for post_id in post_ids if post_id not in known]
+        )
+
+    def store(self, user_id, states):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] < now:
+                if len(self._users) >= self.max_users:
+                    self._prune(now)
+                entry = self._users[user_id] = (now + self.ttl, {})
+            entry[1].update(states)
+
+    def update(self, user_id, post_id, liked):
+        """Refleja un toggle solo si el usuario ya está en caché."""
+        user_id = uuid.UUID(str(user_id))
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                entry[1][uuid.UUID(str(post_id))] = liked
+
+    def _prune(self, now):
+        for user_id in [user_id for user_id, entry in self._users.items() if entry[0] < now]:
+            del self._users[user_id]
+        while len(self._users) >= self.max_users:
+            self._users.pop(next(iter(self._users)))
+
+
+liked_cache = LikedCache()
+
+
+def liked_post_ids(user_id, post_ids):
+    """
+    Subconjunto de post_ids a los que user_id ha dado 'me gusta', con una
+    única consulta sobre el índice único likes(user_id, post_id) para los
+    posts que no están en caché.
+    """
+    user_id = uuid.UUID(str(user_id))
+    post_ids = [uuid.UUID(str(post_id)) for post_id in post_ids]
+    known, missing = liked_cache.lookup(user_id, post_ids)
+
+    if missing:
+        rows = db.session.execute(LIKED_SQL, {"user_id": user_id, "post_ids": missing})
+        liked = {row.post_id for row in rows}
+        states = {post_id: post_id in liked for post_id in missing}
+        liked_cache.store(user_id, states)
+        known.update(states)
+
+    return {post_id for post_id, liked in known.items() if liked}
@@ -1,6 +1,8 @@
 # Importaciones de terceros
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import text
 from sqlalchemy.sql import func
+import hashlib
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
 # Importaciones locales
@@ -137,6 +139,55 @@ class Comment(db.Model):
         """
         return f"<Comment {self.id} by {self.user.username} on Post {self.post.id}>"
 
+    # Inserta un lote de comentarios (solo los de posts que existen) y suma
+    # a cada post su número de comentarios nuevos con un único UPDATE.
+    # clock_timestamp() respeta el orden del lote dentro de la transacción.
+    CREATE_MANY_SQL = text("""
+        WITH input AS (
+            SELECT * FROM unnest(
+                CAST(:ids AS uuid[]), CAST(:user_ids AS uuid[]),
+                CAST(:post_ids AS uuid[]), CAST(:contents AS text[])
+            ) WITH ORDINALITY AS i(id, user_id, post_id, content, ord)
+        ), inserted AS (
+            INSERT INTO comments (id, content, timestamp, user_id, post_id)
+            SELECT i.id, i.content, clock_timestamp(), i.user_id, i.post_id
+            FROM input i
+            JOIN posts p ON p.id = i.post_id
+            ORDER BY i.ord
+            RETURNING id, post_id
+        ), deltas AS (
+            SELECT post_id, count(*) AS delta FROM inserted GROUP BY post_id
+        ), updated AS (
+            UPDATE posts p
+            SET comments_count = COALESCE(p.comments_count, 0) + deltas.delta
+            FROM deltas
+            WHERE p.id = deltas.post_id
+            RETURNING p.id, p.comments_count
+        )
+        SELECT n.id, u.comments_count
+        FROM inserted n
+        JOIN updated u ON u.id = n.post_id
+    """)
+
+    @classmethod
+    def create_many(cls, comments):
+        """
+        Crea varios comentarios y actualiza comments_count en una sola sentencia.
+
+        Args:
+            comments (list): Tuplas (id, user_id, post_id, content).
+
+        Returns:
+            dict: {id: comments_count del post tras el lote}; los de posts inexistentes no aparecen.
+        """
+        rows = db.session.execute(cls.CREATE_MANY_SQL, {
+            "ids": [uuid.UUID(str(c[0])) for c in comments],
+            "user_ids": [uuid.UUID(str(c[1])) for c in comments],
+            "post_ids": [uuid.UUID(str(c[2])) for c in comments],
+            "contents": [c[3] for c in comments],
+        })
+        return {row.id: row.comments_count for row in rows}
+
 
 class Like(db.Model):
     """
@@ -158,6 +209,124 @@ class Like(db.Model):
         db.UniqueConstraint('user_id', 'post_id', name='_user_post_uc'),
     )
 
+    # Alterna el 'me gusta' y ajusta posts.likes_count en una sola sentencia:
+    # sin SELECT ... FOR UPDATE previo y con un único viaje a la base de datos.
+    # Si otro toggle concurrente del mismo par insertó primero, el INSERT no
+    # hace nada y no hay cambio: el 'me gusta' existe (liked) y changed es false.
+    TOGGLE_SQL = text("""
+        WITH deleted AS (
+            DELETE FROM likes
+            WHERE user_id = :user_id AND post_id = :post_id
+            RETURNING post_id
+        ), inserted AS (
+            INSERT INTO likes (id, user_id, post_id)
+            SELECT :like_id, :user_id, :post_id
+            WHERE NOT EXISTS (SELECT 1 FROM deleted)
+              AND EXISTS (SELECT 1 FROM posts WHERE id = :post_id)
+            ON CONFLICT ON CONSTRAINT _user_post_uc DO NOTHING
+            RETURNING post_id
+        )
+        UPDATE posts
+        SET likes_count = GREATEST(
+            COALESCE(likes_count, 0)
+            + (SELECT count(*) FROM inserted)
+            - (SELECT count(*) FROM deleted),
+            0
+        )
+        WHERE id = :post_id
+        RETURNING likes_count,
+                  NOT EXISTS (SELECT 1 FROM deleted) AS liked,
+                  EXISTS (SELECT 1 FROM inserted) OR EXISTS (SELECT 1 FROM deleted) AS changed
+    """)
+
+    # 'me gusta' / 'ya no me gusta' con semántica de conjunto: repetirlos no
+    # cambia nada y, si no hay cambio, el post ni siquiera se bloquea.
+    LIKE_SQL = text("""
+        WITH changed AS (
+            INSERT INTO likes (id, user_id, post_id)
+            SELECT :like_id, :user_id, :post_id
+            WHERE EXISTS (SELECT 1 FROM posts WHERE id = :post_id)
+            ON CONFLICT ON CONSTRAINT _user_post_uc DO NOTHING
+            RETURNING post_id
+        ), updated AS (
+            UPDATE posts
+            SET likes_count = COALESCE(likes_count, 0) + 1
+            WHERE id = :post_id AND EXISTS (SELECT 1 FROM changed)
+            RETURNING likes_count
+        )
+        SELECT likes_count, true AS changed FROM updated
+        UNION ALL
+        SELECT likes_count, false FROM posts
+        WHERE id = :post_id AND NOT EXISTS (SELECT 1 FROM changed)
+    """)
+
+    UNLIKE_SQL = text("""
+        WITH changed AS (
+            DELETE FROM likes
+            WHERE user_id = :user_id AND post_id = :post_id
+            RETURNING post_id
+        ), updated AS (
+            UPDATE posts
+            SET likes_count = GREATEST(COALESCE(likes_count, 0) - 1, 0)
+            WHERE id = :post_id AND EXISTS (SELECT 1 FROM changed)
+            RETURNING likes_count
+        )
+        SELECT likes_count, true AS changed FROM updated
+        UNION ALL
+        SELECT likes_count, false FROM posts
+        WHERE id = :post_id AND NOT EXISTS (SELECT 1 FROM changed)
+    """)
+
+    # Igual que TOGGLE_SQL pero para un lote de pares (user_id, post_id)
+    # distintos; ajusta cada post una sola vez con el delta agregado.
+    TOGGLE_MANY_SQL = text("""
+        WITH input AS (
+            SELECT * FROM unnest(
+                CAST(:like_ids AS uuid[]), CAST(:user_ids AS uuid[]), CAST(:post_ids AS uuid[])
+            ) AS i(like_id, user_id, post_id)
+        ), deleted AS (
+            DELETE FROM likes l
+            USING input i
+            WHERE l.user_id = i.user_id AND l.post_id = i.post_id
+            RETURNING l.user_id, l.post_id
+        ), inserted AS (
+            INSERT INTO likes (id, user_id, post_id)
+            SELECT i.like_id, i.user_id, i.post_id
+            FROM input i
+            WHERE NOT EXISTS (SELECT 1 FROM deleted d WHERE d.user_id = i.user_id AND d.post_id = i.post_id)
+              AND EXISTS (SELECT 1 FROM posts WHERE id = i.post_id)
+            ON CONFLICT ON CONSTRAINT _user_post_uc DO NOTHING
+            RETURNING user_id, post_id
+        ), deltas AS (
+            SELECT post_id, sum(delta) AS delta
+            FROM (
+                SELECT post_id, 1 AS delta FROM inserted
+                UNION ALL
+                SELECT post_id, -1 FROM deleted
+            ) changes
+            GROUP BY post_id
+        ), updated AS (
+            UPDATE posts p
+            SET likes_count = GREATEST(COALESCE(p.likes_count, 0) + deltas.delta, 0)
+            FROM deltas
+            WHERE p.id = deltas.post_id
+            RETURNING p.id, p.likes_count
+        )
+        SELECT i.user_id, i.post_id,
+               NOT EXISTS (
+                   SELECT 1 FROM deleted d WHERE d.user_id = i.user_id AND d.post_id = i.post_id
+               ) AS liked,
+               EXISTS (
+                   SELECT 1 FROM inserted n WHERE n.user_id = i.user_id AND n.post_id = i.post_id
+               ) OR EXISTS (
+                   SELECT 1 FROM deleted d WHERE d.user_id = i.user_id AND d.post_id = i.post_id
+               ) AS changed,
+               COALESCE(u.likes_count, p.likes_count) AS likes_count
+        FROM input i
+        JOIN posts p ON p.id = i.post_id
+        LEFT JOIN updated u ON u.id = i.post_id
+    """)
+
     def __repr__(self):
         """
         Representación en cadena del objeto Like.
@@ -167,6 +336,186 @@ class Like(db.Model):
         """
         return f"<Like by {self.user.username} on Post {self.post.id}>"
 
+    @classmethod
+    def toggle(cls, user_id, post_id):
+        """
+        Alterna el 'me gusta' de un usuario en un post de forma atómica.
+
+        Args:
+            user_id (UUID): ID del usuario.
+            post_id (UUID): ID del post.
+
+        Returns:
+            tuple | None: (changed, liked, likes_count) tras el cambio, o None
+            si el post no existe. changed es False si un toggle concurrente del
+            mismo par se adelantó; liked es entonces el estado real.
+        """
+        row = db.session.execute(cls.TOGGLE_SQL, {
+            "like_id": uuid.uuid4(),
+            "user_id": uuid.UUID(str(user_id)),
+            "post_id": uuid.UUID(str(post_id)),
+        }).first()
+        if row is None:
+            return None
+        return row.changed, row.liked, row.likes_count
+
+    @classmethod
+    def set_liked(cls, user_id, post_id, liked):
+        """
+        Deja el 'me gusta' de un usuario en un post en el estado indicado.
+
+        Args:
+            user_id (UUID): ID del usuario.
+            post_id (UUID): ID del post.
+            liked (bool): True para dar 'me gusta', False para quitarlo.
+
+        Returns:
+            tuple | None: (changed, likes_count), o None si el post no existe.
+        """
+        row = db.session.execute(cls.LIKE_SQL if liked else cls.UNLIKE_SQL, {
+            "like_id": uuid.uuid4(),
+            "user_id": uuid.UUID(str(user_id)),
+            "post_id": uuid.UUID(str(post_id)),
+        }).first()
+        if row is None:
+            return None
+        return row.changed, row.likes_count
+
+    @classmethod
+    def is_liked(cls, user_id, post_id):
+        return db.session.query(
+            cls.query.filter_by(user_id=uuid.UUID(str(user_id)), post_id=post_id).exists()
+        ).scalar()
+
+    @classmethod
+    def toggle_many(cls, pairs):
+        """
+        Alterna varios 'me gusta' en una sola sentencia.
+
+        Args:
+            pairs (list): Pares (user_id, post_id) sin repetir.
+
+        Returns:
+            dict: {(user_id, post_id): (changed, liked, likes_count)}, como en
+            toggle(); los posts inexistentes no aparecen.
+        """
+        user_ids = [uuid.UUID(str(user_id)) for user_id, _ in pairs]
+        post_ids = [uuid.UUID(str(post_id)) for _, post_id in pairs]
+        rows = db.session.execute(cls.TOGGLE_MANY_SQL, {
+            "like_ids": [uuid.uuid4() for _ in pairs],
+            "user_ids": user_ids,
+            "post_ids": post_ids,
+        })
+        return {(row.user_id, row.post_id): (row.changed, row.liked, row.likes_count) for row in rows}
+
+class Operation(db.Model):
+    """
+    Operación ya aplicada, identificada por el `op_id` que envía el cliente.
+    Se inserta en la misma transacción que el cambio que protege, de modo
+    que un evento reenviado tras una reconexión no se aplica dos veces.
+
+    El op_id se guarda con el tipo de operación delante ('like:...',
+    'comment:...'): el mismo op_id en un like y en un comentario son dos
+    operaciones distintas.
+    """
+    __tablename__ = 'operations'
+
+    user_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    op_id = db.Column(db.String(64), primary_key=True)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    CLAIM_SQL = text("""
+        INSERT INTO operations (user_id, op_id)
+        VALUES (:user_id, :op_id)
+        ON CONFLICT DO NOTHING
+        RETURNING op_id
+    """)
+
+    @staticmethod
+    def key(kind, op_id):
+        """Clave de la operación: '<kind>:<op_id>', o con el op_id resumido si no cabe en la columna."""
+        key = f"{kind}:{op_id}"
+        if len(key) > 64:
+            key = f"{kind}#{hashlib.sha1(op_id.encode()).hexdigest()}"
+        return key
+
+    @classmethod
+    def claim(cls, user_id, kind, op_id):
+        """
+        Registra la operación en la transacción actual.
+
+        Args:
+            user_id (UUID): ID del usuario.
+            kind (str): Tipo de operación ('like' o 'comment').
+            op_id (str): ID de la operación que envía el cliente.
+
+        Returns:
+            bool: True si es nueva, False si ya se había aplicado.
+        """
+        row = db.session.execute(cls.CLAIM_SQL, {
+            "user_id": uuid.UUID(str(user_id)), "op_id": cls.key(kind, op_id)
+        }).first()
+        return row is not None
+
+    @classmethod
+    def purge(cls, max_age):
+        """Borra las operaciones registradas hace más de `max_age` segundos."""
+        return db.session.execute(
+            text("DELETE FROM operations WHERE created_at < now() - make_interval(secs => :max_age)"),
+            {"max_age": max_age}
+        ).rowcount
+
+
+class UserStats(db.Model):
+    """
+    Totales por usuario que mantiene user-service (GET /user/<id>/stats).
+    Aquí solo se ajustan los recibidos por el autor del post, por lotes y
+    fuera de la transacción del like o el comentario (ver stats.py), y solo
+    si su fila ya existe; user-service la crea al leerla por primera vez.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    posts_count = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    comments_received = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Agrupa los deltas por autor: un lote toca cada fila de user_stats una vez
+    ADD_RECEIVED_SQL = text("""
+        UPDATE user_stats s
+        SET likes_received = GREATEST(s.likes_received + d.likes, 0),
+            comments_received = GREATEST(s.comments_received + d.comments, 0),
+            updated_at = now()
+        FROM (
+            SELECT p.user_id, sum(i.likes) AS likes, sum(i.comments) AS comments
+            FROM unnest(CAST(:post_ids AS uuid[]), CAST(:likes AS integer[]), CAST(:comments AS integer[]))
+                AS i(post_id, likes, comments)
+            JOIN posts p ON p.id = i.post_id
+            GROUP BY p.user_id
+        ) d
+        WHERE s.user_id = d.user_id
+    """)
+
+    @classmethod
+    def add_received(cls, likes=None, comments=None):
+        """
+        Suma a los autores los likes y comentarios recibidos en sus posts.
+
+        Args:
+            likes (dict): {post_id: delta de likes}.
+            comments (dict): {post_id: delta de comentarios}.
+        """
+        likes, comments = likes or {}, comments or {}
+        post_ids = [post_id for post_id in {**likes, **comments} if likes.get(post_id) or comments.get(post_id)]
+        if not post_ids:
+            return
+        db.session.execute(cls.ADD_RECEIVED_SQL, {
+            "post_ids": [uuid.UUID(str(post_id)) for post_id in post_ids],
+            "likes": [likes.get(post_id, 0) for post_id in post_ids],
+            "comments": [comments.get(post_id, 0) for post_id in post_ids],
+        })
+
 # -------------------------------------------------------------------
 # FIN DE LOS MODELOS
 # -------------------------------------------------------------------
@@ -0,0 +1,112 @@
+import itertools
+import json
+import threading
+import time
+
+import psycopg
+from socketio import PubSubManager
+
+# Postgres rechaza payloads de NOTIFY de 8000 bytes o más
+MAX_PAYLOAD_BYTES = 7900
+
+
+class PostgresManager(PubSubManager):
+    """
+    Gestor de clientes de Socket.IO que usa LISTEN/NOTIFY de Postgres como
+    bus de mensajes, para que un emit en una réplica llegue a los clientes
+    conectados a todas las demás.
+
+    Los mensajes publicados se acumulan durante `batch_window` segundos y se
+    envían empaquetados en el menor número de NOTIFY posible (cada uno por
+    debajo del límite de 8000 bytes), todos en una misma transacción.
+    """
+    name = 'postgres'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None, batch_window=0.01):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.conninfo = url
+        self.batch_window = batch_window
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._flusher = None
+        self._conn = None
+        self._seq = itertools.count()
+
+    def _publish(self, data):
+        message = json.dumps(data, separators=(',', ':'), default=str)
+        if len(message.encode()) > MAX_PAYLOAD_BYTES:
+            self._get_logger().error(f"Socket.IO message too large for NOTIFY: {data.get('event')}")
+            return
+
+        with self._queue_lock:
+            self._queue.append(message)
+            if self.batch_window <= 0:
+                pending, self._queue = self._queue, []
+            else:
+                pending = None
+                if self._flusher is None:
+                    self._flusher = self._start_task(self._flush_loop)
+        if pending:
+            self._send(pending)
+
+    def _start_task(self, target):
+        # Un gestor write_only puede usarse fuera de un servidor (otro proceso)
+        if self.server is not None:
+            return self.server.start_background_task(target)
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def _sleep(self, seconds):
+        if self.server is not None:
+            return self.server.sleep(seconds)
+        time.sleep(seconds)
+
+    def _flush_loop(self):
+        while True:
+            self._sleep(self.batch_window)
+            with self._queue_lock:
+                pending, self._queue = self._queue, []
+            if pending:
+                self._send(pending)
+
+    def _batches(self, messages):
+        # Cada NOTIFY lleva un número de secuencia: Postgres descarta los
+        # payloads idénticos enviados en una misma transacción.
+        batch, size = [], 0
+        for message in messages:
+            length = len(message.encode()) + 1
+            if batch and size + length > MAX_PAYLOAD_BYTES - 32:
+                yield batch
+                batch, size = [], 0
+            batch.append(message)
+            size += length
+        if batch:
+            yield batch
+
+    def _send(self, messages):
+        for attempt in range(2):
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._conn = psycopg.connect(self.conninfo, autocommit=True)
+                with self._conn.transaction():
+                    for batch in self._batches(messages):
+                        payload = f'{{"seq":{next(self._seq)},"messages":[{",".join(batch)}]}}'
+                        self._conn.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                return
+            except psycopg.OperationalError as e:
+                self._get_logger().error(f"Postgres manager publish error: {str(e)}")
+                self._conn = None
+        self._get_logger().error(f"Dropped {len(messages)} Socket.IO messages")
+
+    def _listen(self):
+        while True:
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{self.channel}"')
+                    for notify in conn.notifies():
+                        for message in json.loads(notify.payload)['messages']:
+                            yield message
+            except psycopg.OperationalError as e:
+                self._get_logger().error(f"Postgres manager listen error: {str(e)}")
+                self._sleep(1)
@@ -1,18 +1,28 @@
+import time
 import uuid
 import logging
 
 from flask import request
-from flask_socketio import disconnect, emit
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_socketio import disconnect, emit, join_room, leave_room
+from flask_jwt_extended import decode_token, get_jwt, get_jwt_identity, verify_jwt_in_request
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from .broadcast import feed_notifier, like_broadcaster, post_room
 from .extensions import db, socketio
-from .models import Post, Like, Comment
-from .schemas import PostSchema, CommentSchema
+from .flood import event_limiter
+from .idempotency import comment_id_for, op_cache, validate_op_id
+from .liked import liked_cache
+from .models import Post, Like, Comment, Operation
+from .schemas import CommentSchema
+from .sessions import socket_sessions
+from .stats import received_stats
+from .write_behind import write_behind
 
 logger = logging.getLogger(__name__)
 
-post_schema = PostSchema()
+# Máximo de posts a los que se puede suscribir un cliente en un solo evento
+MAX_ROOMS_PER_EVENT = 100
+
 comment_schema = CommentSchema()
 
 
@@ -20,13 +30,36 @@ comment_schema = CommentSchema()
 
 
 def get_current_user():
-    try:
-        verify_jwt_in_request()
-        return get_jwt_identity()
-    except Exception as e:
-        logger.error(f"JWT verification failed: {str(e)}")
+    # El JWT se verifica una sola vez en el connect; aquí solo se consulta la sesión
+    session = socket_sessions.get(request.sid)
+    if session is None:
         emit('error', {'message': 'Authentication failed'}, to=request.sid)
         disconnect()
+        raise PermissionError('unauthenticated socket')
+
+    user_id, expires_at = session
+    if expires_at is not None and expires_at <= time.time():
+        emit('reauth_required', {'expired_at': expires_at}, to=request.sid)
+        raise PermissionError('token expired')
+    return user_id
+
+
+def get_post_ids(data):
+    # Acepta {'post_id': id} o {'post_ids': [id, ...]}
+    post_ids = data.get('post_ids')
+    if post_ids is None:
+        post_ids = [data.get('post_id')]
+    if not isinstance(post_ids, list) or len(post_ids) > MAX_ROOMS_PER_EVENT:
+        emit('error', {'message': f'post_ids debe ser una lista de hasta {MAX_ROOMS_PER_EVENT} IDs'}, to=request.sid)
+        raise ValueError('invalid post_ids')
+    return [validate_uuid(post_id, 'Post ID') for post_id in post_ids]
+
+
+def get_op_id(data):
+    try:
+        return validate_op_id(data.get('op_id'))
+    except ValueError:
+        emit('error', {'message': 'op_id inválido'}, to=request.sid)
         raise
 
 
@@ -45,61 +78,172 @@ def validate_uuid(id_value, field_name='ID'):
 def on_connect():
     logger.info(f"Client connected: {request.sid}")
     try:
-        user_id = get_current_user()
-        logger.info(f"User {user_id} authenticated successfully")
-    except Exception:
-        pass
+        verify_jwt_in_request()
+    except Exception as e:
+        logger.error(f"JWT verification failed: {str(e)}")
+        raise ConnectionRefusedError('Authentication failed')
+
+    user_id = get_jwt_identity()
+    socket_sessions.add(request.sid, user_id, get_jwt().get('exp'))
+    logger.info(f"User {user_id} authenticated successfully")
+
+
+@socketio.on('reauth')
+@event_limiter.limit('reauth')
+def on_reauth(data):
+    # Renueva el token de un socket ya conectado sin reconectar
+    session = socket_sessions.get(request.sid)
+    try:
+        claims = decode_token(data.get('token', ''))
+        if claims.get('type') != 'access':
+            raise ValueError('not an access token')
+        if session and str(claims['sub']) != str(session[0]):
+            raise ValueError('identity mismatch')
+    except Exception as e:
+        logger.error(f"JWT re-authentication failed: {str(e)}")
+        emit('error', {'message': 'Authentication failed'}, to=request.sid)
+        return
+
+    socket_sessions.add(request.sid, claims['sub'], claims.get('exp'))
+    emit('reauth_ok', {'expires_at': claims.get('exp')}, to=request.sid)
 
 
 @socketio.on('disconnect')
 def on_disconnect():
+    socket_sessions.remove(request.sid)
+    event_limiter.forget(request.sid)
     logger.info(f"Client disconnected: {request.sid}")
 
 
-@socketio.on('like_post')
-def on_like_post(data):
-    logger.info(f"like_post event received: {data}")
+@socketio.on('join_posts')
+@event_limiter.limit('join_posts')
+def on_join_posts(data):
+    # El cliente se suscribe a los posts que tiene en pantalla
+    try:
+        post_ids = get_post_ids(data)
+    except Exception:
+        return
+
+    for post_id in post_ids:
+        join_room(post_room(post_id))
+
+
+@socketio.on('leave_posts')
+@event_limiter.limit('leave_posts')
+def on_leave_posts(data):
+    try:
+        post_ids = get_post_ids(data)
+    except Exception:
+        return
+
+    for post_id in post_ids:
+        leave_room(post_room(post_id))
+
 
+def apply_like(data, mode):
+    """
+    Aplica un evento de 'me gusta': 'toggle' (like_post), 'like' o 'unlike'.
+    Con op_id, un reintento de la misma operación no se vuelve a aplicar y
+    se contesta con el like_status de la primera vez.
+    """
     try:
         user_id = get_current_user()
         post_id = validate_uuid(data.get('post_id'), 'Post ID')
+        op_id = get_op_id(data)
     except Exception:
         return
 
-    try:
-        with db.session.begin():
-            post = Post.query.with_for_update().get(post_id)
-            if not post:
-                emit('error', {'message': 'Post not found'}, to=request.sid)
-                return
+    if op_id:
+        cached = op_cache.get(user_id, 'like', op_id)
+        if cached:
+            emit(*cached, to=request.sid)
+            return
 
-            like = Like.query.filter_by(user_id=user_id, post_id=post_id).first()
+    if write_behind.enabled and mode == 'toggle' and op_id is None:
+        # like_status se emite cuando el lote hace commit
+        if not write_behind.submit({'kind': 'like', 'sid': request.sid, 'user_id': user_id, 'post_id': post_id}):
+            emit('error', {'message': 'Server busy, try again'}, to=request.sid)
+        return
 
-            if like:
-                db.session.delete(like)
-                post.likes_count = max(post.likes_count - 1, 0)
-                logger.info(f"User {user_id} removed like from post {post_id}")
+    try:
+        with db.session.begin():
+            if op_id and not Operation.claim(user_id, 'like', op_id):
+                # Ya aplicada (en otra réplica o antes de un reinicio): estado actual
+                post = db.session.get(Post, post_id)
+                if not post:
+                    emit('error', {'message': 'Post not found'}, to=request.sid)
+                    return
+                changed, liked, likes_count = False, Like.is_liked(user_id, post_id), post.likes_count
             else:
-                new_like = Like(user_id=user_id, post_id=post_id)
-                db.session.add(new_like)
-                post.likes_count += 1
-                logger.info(f"User {user_id} liked post {post_id}")
-
-        emit('update_likes', post_schema.dump(post), broadcast=True)
+                if mode == 'toggle':
+                    result = Like.toggle(user_id, post_id)
+                else:
+                    result = Like.set_liked(user_id, post_id, mode == 'like')
+                if result is None:
+                    emit('error', {'message': 'Post not found'}, to=request.sid)
+                    return
+
+                if mode == 'toggle':
+                    changed, liked, likes_count = result
+                else:
+                    changed, likes_count = result
+                    liked = mode == 'like'
+
+                if changed:
+                    if liked:
+                        logger.info(f"User {user_id} liked post {post_id}")
+                    else:
+                        logger.info(f"User {user_id} removed like from post {post_id}")
+
+        if changed:
+            # Solo el delta, agrupado por ventana, y solo a quien tiene el post en pantalla
+            like_broadcaster.add(post_id, likes_count)
+            feed_notifier.add(post_id)
+            received_stats.add(likes={post_id: 1 if liked else -1})
+            liked_cache.update(user_id, post_id, liked)
+
+        status = {'post_id': str(post_id), 'liked': liked}
+        if op_id:
+            status['op_id'] = op_id
+            op_cache.set(user_id, 'like', op_id, ('like_status', status))
+        emit('like_status', status, to=request.sid)
 
     except (IntegrityError, SQLAlchemyError) as e:
         db.session.rollback()
-        logger.error(f"DB error on like_post: {str(e)}")
+        logger.error(f"DB error on {mode} like: {str(e)}")
         emit('error', {'message': 'Database error processing like'}, to=request.sid)
 
 
+@socketio.on('like_post')
+@event_limiter.limit('like_post')
+def on_like_post(data):
+    logger.info(f"like_post event received: {data}")
+    apply_like(data, 'toggle')
+
+
+@socketio.on('like')
+@event_limiter.limit('like')
+def on_like(data):
+    logger.info(f"like event received: {data}")
+    apply_like(data, 'like')
+
+
+@socketio.on('unlike')
+@event_limiter.limit('unlike')
+def on_unlike(data):
+    logger.info(f"unlike event received: {data}")
+    apply_like(data, 'unlike')
+
+
 @socketio.on('comment_post')
+@event_limiter.limit('comment_post')
 def on_comment_post(data):
     logger.info(f"comment_post event received: {data}")
 
     try:
         user_id = get_current_user()
         post_id = validate_uuid(data.get('post_id'), 'Post ID')
+        op_id = get_op_id(data)
         content = data.get('content', '').strip()
 
         if not content or not (1 <= len(content) <= 500):
@@ -109,19 +253,57 @@ def on_comment_post(data):
     except Exception:
         return
 
+    if op_id:
+        cached = op_cache.get(user_id, 'comment', op_id)
+        if cached:
+            emit(*cached, to=request.sid)
+            return
+
+    if write_behind.enabled and op_id is None:
+        event = {
+            'kind': 'comment', 'sid': request.sid, 'id': uuid.uuid4(),
+            'user_id': user_id, 'post_id': post_id, 'content': content
+        }
+        if not write_behind.submit(event):
+            emit('error', {'message': 'Server busy, try again'}, to=request.sid)
+        return
+
+    comment_id = comment_id_for(user_id, op_id) if op_id else uuid.uuid4()
+
     try:
         with db.session.begin():
+            if op_id and not Operation.claim(user_id, 'comment', op_id):
+                # Reintento de un comentario ya creado: se le devuelve solo a quien lo envió
+                comment = db.session.get(Comment, comment_id)
+                if not comment:
+                    # Se creó y ya se ha borrado (o se borró su post)
+                    emit('error', {'message': 'Operation already applied', 'op_id': op_id}, to=request.sid)
+                    return
+                payload = comment_schema.dump(comment)
+                payload['comments_count'] = comment.post.comments_count
+                payload['op_id'] = op_id
+                emit('new_comment', payload, to=request.sid)
+                return
+
             post = Post.query.with_for_update().get(post_id)
             if not post:
                 emit('error', {'message': 'Post not found'}, to=request.sid)
                 return
 
-            comment = Comment(content=content, user_id=user_id, post_id=post_id)
+            comment = Comment(id=comment_id, content=content, user_id=user_id, post_id=post_id)
             db.session.add(comment)
 
             post.comments_count += 1
-
-        emit('new_comment', comment_schema.dump(comment), broadcast=True)
+            comments_count = post.comments_count
+        feed_notifier.add(post_id)
+        received_stats.add(comments={post_id: 1})
+
+        payload = comment_schema.dump(comment)
+        payload['comments_count'] = comments_count
+        if op_id:
+            payload['op_id'] = op_id
+            op_cache.set(user_id, 'comment', op_id, ('new_comment', payload))
+        emit('new_comment', payload, to=post_room(post_id))
 
     except (IntegrityError, SQLAlchemyError) as e:
         db.session.rollback()
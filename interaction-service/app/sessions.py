@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+
+from .extensions import socketio
+
+logger = logging.getLogger(__name__)
+
+
+class SocketSessions:
+    """
+    Identidad autenticada de cada socket, verificada una sola vez en el
+    connect (o en un 'reauth') y guardada por `sid` junto con el `exp` del
+    token, para no volver a verificar la firma del JWT en cada evento.
+
+    Una tarea en segundo plano revisa cada `interval` segundos los sockets
+    cuyo token ha caducado: les pide un 'reauth_required' y, si pasado
+    `grace` segundos siguen sin renovarlo, los desconecta.
+    """
+
+    def __init__(self, grace=60, interval=15):
+        self.grace = grace
+        self.interval = interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def configure(self, grace):
+        with self._lock:
+            self.grace = grace
+
+    def add(self, sid, user_id, expires_at):
+        with self._lock:
+            self._sessions[sid] = (user_id, expires_at)
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+
+    def get(self, sid):
+        return self._sessions.get(sid)
+
+    def remove(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def sweep(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            expired = [
+                (sid, expires_at) for sid, (_, expires_at) in self._sessions.items()
+                if expires_at is not None and expires_at <= now
+            ]
+        for sid, expires_at in expired:
+            if expires_at + self.grace <= now:
+                logger.info(f"Disconnecting {sid}: token expired")
+                self.remove(sid)
+                socketio.server.disconnect(sid, namespace='/')
+            else:
+                socketio.emit('reauth_required', {'expired_at': expires_at}, to=sid)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping socket sessions: {str(e)}")
+
+
+socket_sessions = SocketSessions()
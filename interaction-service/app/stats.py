@@ -0,0 +1,75 @@
+import atexit
+import logging
+import threading
+
+from .extensions import db, socketio
+from .models import UserStats
+
+logger = logging.getLogger(__name__)
+
+
+class ReceivedStatsBuffer:
+    """
+    Likes y comentarios recibidos por post, pendientes de sumar a la fila
+    user_stats de sus autores. Se aplican una vez por ventana (`window`, en
+    segundos) en una transacción propia, con UserStats.add_received, y no
+    en la del like: así la fila del autor de un post caliente no es un
+    segundo bloqueo en cada like.
+
+    Solo se añaden deltas de cambios ya confirmados. Si un envío falla o el
+    proceso cae, esos deltas se pierden hasta el siguiente
+    `flask reconcile-stats` de user-service.
+    """
+
+    def __init__(self, window=1.0):
+        self.app = None
+        self.window = window
+        self.flushes = 0
+        self.errors = 0
+        self._likes = {}
+        self._comments = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def configure(self, app, window):
+        with self._lock:
+            self.app = app
+            self.window = window
+        atexit.register(self.flush)
+
+    def add(self, likes=None, comments=None):
+        """Acumula {post_id: delta} de likes y de comentarios."""
+        with self._lock:
+            for pending, deltas in ((self._likes, likes or {}), (self._comments, comments or {})):
+                for post_id, delta in deltas.items():
+                    pending[post_id] = pending.get(post_id, 0) + delta
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+
+    def flush(self):
+        with self._lock:
+            likes, self._likes = self._likes, {}
+            comments, self._comments = self._comments, {}
+        if not likes and not comments:
+            return
+        with self.app.app_context():
+            try:
+                with db.session.begin():
+                    UserStats.add_received(likes=likes, comments=comments)
+            finally:
+                db.session.remove()
+        with self._lock:
+            self.flushes += 1
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.error(f"Error flushing user stats: {str(e)}")
+
+
+received_stats = ReceivedStatsBuffer()
@@ -0,0 +1,239 @@
+import atexit
+import logging
+import threading
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+
+from .broadcast import feed_notifier, like_broadcaster, post_room
+from .extensions import db, socketio
+from .liked import liked_cache
+from .models import Comment, Like
+from .schemas import CommentSchema
+from .stats import received_stats
+
+logger = logging.getLogger(__name__)
+
+comment_schema = CommentSchema()
+
+
+class WriteBehindQueue:
+    """
+    Cola en memoria de likes y comentarios que un flusher persiste por lotes:
+    cada lote es una transacción (un solo commit) con una sentencia por ronda
+    de likes (Like.toggle_many) y otra para los comentarios
+    (Comment.create_many), con los contadores actualizados una vez por post.
+
+    El lote sale al llegar a `batch_size` eventos o cada `interval` segundos.
+    El cliente recibe like_status / new_comment solo tras el commit, así que
+    lo que se le confirma no se pierde si el proceso cae; lo que estaba aún en
+    la cola sí, y el cliente debe reintentarlo. Con durability='relaxed' los
+    lotes usan synchronous_commit=off: más rendimiento a cambio de poder
+    perder los últimos lotes confirmados si cae Postgres.
+    """
+
+    def __init__(self, batch_size=500, interval=0.02, max_queue=10000, durability='strict'):
+        self.enabled = False
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queue = max_queue
+        self.durability = durability
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+        self._app = None
+        self._events = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._task = None
+
+    def configure(self, app, enabled, batch_size, interval, max_queue, durability):
+        self._app = app
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queue = max_queue
+        self.durability = durability
+        if enabled:
+            # En un apagado ordenado se vacía la cola antes de salir
+            atexit.register(self.flush)
+
+    def submit(self, event):
+        """Encola un evento; devuelve False si la cola está llena."""
+        event['user_id'] = uuid.UUID(str(event['user_id']))
+        event['post_id'] = uuid.UUID(str(event['post_id']))
+        with self._lock:
+            if len(self._events) >= self.max_queue:
+                self.rejected += 1
+                return False
+            self._events.append(event)
+            self.enqueued += 1
+            full = len(self._events) >= self.batch_size
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+        if full:
+            self._wakeup.set()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'durability': self.durability,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'failed': self.failed,
+                'pending': len(self._events),
+            }
+
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._events[:self.batch_size]
+                    del self._events[:self.batch_size]
+                if not batch:
+                    return
+                with self._app.app_context():
+                    try:
+                        self._write_batch(batch)
+                    finally:
+                        db.session.remove()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flusher error: {str(e)}")
+
+    def _write_batch(self, batch):
+        # Cada evento del lote, ya sacado de la cola, acaba con su confirmación o con un error
+        try:
+            results = self._write(batch)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Write-behind batch of {len(batch)} failed, retrying one by one: {str(e)}")
+            # Aísla el evento que rompe el lote (p. ej. un usuario inexistente)
+            for event in batch:
+                try:
+                    results = self._write([event])
+                except Exception as e:
+                    db.session.rollback()
+                    with self._lock:
+                        self.failed += 1
+                    logger.error(f"Write-behind event failed: {str(e)}")
+                    socketio.emit('error', {'message': 'Database error processing event'}, to=event['sid'])
+                    continue
+                finally:
+                    db.session.remove()
+                self._deliver(*results)
+            return
+        self._deliver(*results)
+
+    def _write(self, batch):
+        likes = [event for event in batch if event['kind'] == 'like']
+        comments = [event for event in batch if event['kind'] == 'comment']
+
+        like_results = []
+        comment_counts = {}
+        with db.session.begin():
+            if self.durability == 'relaxed':
+                db.session.execute(text("SET LOCAL synchronous_commit TO OFF"))
+
+            for round_events in self._rounds(likes):
+                toggled = Like.toggle_many([(event['user_id'], event['post_id']) for event in round_events])
+                like_results.extend(
+                    (event, toggled.get((event['user_id'], event['post_id']))) for event in round_events
+                )
+
+            if comments:
+                comment_counts = Comment.create_many([
+                    (event['id'], event['user_id'], event['post_id'], event['content']) for event in comments
+                ])
+
+        with self._lock:
+            self.batches += 1
+            self.flushed += len(batch)
+        return like_results, comments, comment_counts
+
+    @staticmethod
+    def _rounds(likes):
+        # Toggle_many necesita pares distintos: la n-ésima repetición de un
+        # mismo (user_id, post_id) va en la ronda n, respetando el orden.
+        rounds = []
+        seen = {}
+        for event in likes:
+            key = (event['user_id'], event['post_id'])
+            n = seen.get(key, 0)
+            seen[key] = n + 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append(event)
+        return rounds
+
+    def _deliver(self, like_results, comments, comment_counts):
+        # Ya hay commit: un fallo aquí no se reintenta (se aplicaría dos veces), solo se avisa
+        for post_id in {event['post_id'] for event, _ in like_results} | {event['post_id'] for event in comments}:
+            feed_notifier.add(post_id)
+
+        for event, result in like_results:
+            self._confirm(event, self._deliver_like, event, result)
+
+        created = {}
+        if comment_counts:
+            try:
+                created = {
+                    comment.id: comment
+                    for comment in Comment.query.options(joinedload(Comment.user))
+                    .filter(Comment.id.in_(list(comment_counts)))
+                }
+            except Exception as e:
+                logger.error(f"Write-behind could not load created comments: {str(e)}")
+                created = None
+        for event in comments:
+            self._confirm(event, self._deliver_comment, event, created, comment_counts)
+
+    @staticmethod
+    def _confirm(event, deliver, *args):
+        try:
+            deliver(*args)
+        except Exception as e:
+            logger.error(f"Write-behind delivery failed: {str(e)}")
+            socketio.emit('error', {'message': 'Error confirming event'}, to=event['sid'])
+
+    @staticmethod
+    def _deliver_like(event, result):
+        if result is None:
+            socketio.emit('error', {'message': 'Post not found'}, to=event['sid'])
+            return
+        changed, liked, likes_count = result
+        if changed:
+            like_broadcaster.add(event['post_id'], likes_count)
+            received_stats.add(likes={event['post_id']: 1 if liked else -1})
+        liked_cache.update(event['user_id'], event['post_id'], liked)
+        socketio.emit('like_status', {'post_id': str(event['post_id']), 'liked': liked}, to=event['sid'])
+
+    @staticmethod
+    def _deliver_comment(event, created, comment_counts):
+        if created is None:
+            raise RuntimeError("created comments not loaded")
+        comment = created.get(event['id'])
+        if comment is None:
+            socketio.emit('error', {'message': 'Post not found'}, to=event['sid'])
+            return
+        received_stats.add(comments={event['post_id']: 1})
+        payload = comment_schema.dump(comment)
+        payload['comments_count'] = comment_counts[event['id']]
+        socketio.emit('new_comment', payload, to=post_room(event['post_id']))
+
+
+write_behind = WriteBehindQueue()
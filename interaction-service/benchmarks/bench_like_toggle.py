@@ -0,0 +1,122 @@
+"""
+Prueba de carga de 'me gusta' sobre un único post caliente.
+
+Compara el toggle anterior (SELECT ... FOR UPDATE + SELECT + INSERT/DELETE)
+con Like.toggle (una sola sentencia) con N hilos concurrentes, cada uno con
+su propio usuario, y comprueba al final que posts.likes_count coincide con
+el número real de filas en likes.
+
+Uso (desde interaction-service/, con DATABASE_URL apuntando a Postgres):
+    python benchmarks/bench_like_toggle.py --threads 32 --seconds 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.models import db, Like, Post, User  # noqa: E402
+
+
+def legacy_toggle(user_id, post_id):
+    with db.session.begin():
+        post = Post.query.with_for_update().get(post_id)
+        like = Like.query.filter_by(user_id=user_id, post_id=post_id).first()
+        if like:
+            db.session.delete(like)
+            post.likes_count = max(post.likes_count - 1, 0)
+        else:
+            db.session.add(Like(user_id=user_id, post_id=post_id))
+            post.likes_count += 1
+
+
+def atomic_toggle(user_id, post_id):
+    with db.session.begin():
+        Like.toggle(user_id, post_id)
+
+
+def run(app, toggle, user_ids, post_id, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(user_id):
+        local = []
+        with app.app_context():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                toggle(user_id, post_id)
+                local.append(time.perf_counter() - start)
+            db.session.remove()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def report(name, latencies, seconds):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(
+        f"  {name:<8} {len(latencies) / seconds:9.1f} likes/s   "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.threads, 'max_overflow': 0}
+    db.init_app(app)
+
+    tag = uuid.uuid4().hex[:8]
+    with app.app_context():
+        db.create_all()
+        users = [
+            User(username=f"bench_{tag}_{i}", email=f"bench_{tag}_{i}@threadfit.dev", password_hash="x")
+            for i in range(args.threads)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+        post = Post(content="Post caliente", user_id=users[0].id, likes_count=0, comments_count=0)
+        db.session.add(post)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        post_id = post.id
+
+    print(f"Post caliente {post_id}, {args.threads} hilos, {args.seconds:.0f} s por modo")
+    try:
+        for name, toggle in (("legacy", legacy_toggle), ("atomic", atomic_toggle)):
+            latencies = run(app, toggle, user_ids, post_id, args.seconds)
+            report(name, latencies, args.seconds)
+
+            with app.app_context():
+                likes_count = db.session.get(Post, post_id).likes_count
+                real = Like.query.filter_by(post_id=post_id).count()
+                assert likes_count == real, f"{name}: likes_count={likes_count} pero hay {real} likes"
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Post, post_id))
+            User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Latencia y rendimiento de la entrega entre réplicas con PostgresManager.
+
+Lanza N procesos suscriptores (una "réplica" cada uno, escuchando el canal
+con PostgresManager._listen) y un publicador que emite a --rate mensajes/s
+a través de PostgresManager.emit, igual que haría socketio.emit en un pod.
+Cada mensaje lleva su hora de envío; cada suscriptor mide cuánto tarda en
+recibirlo y si le llegan todos.
+
+Uso (desde interaction-service/, con DATABASE_URL apuntando a Postgres):
+    python benchmarks/bench_pg_fanout.py --replicas 4 --rate 2000 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app.pg_manager import PostgresManager  # noqa: E402
+
+
+def make_manager(conninfo, channel, batch_window, write_only):
+    # Sin servidor de Socket.IO: el publicador es un gestor write_only, como
+    # el de un proceso externo, y los suscriptores leen directamente _listen()
+    return PostgresManager(conninfo, channel=channel, write_only=write_only, batch_window=batch_window)
+
+
+def subscriber(conninfo, channel, expected, ready, results):
+    manager = make_manager(conninfo, channel, 0, write_only=False)
+    latencies = []
+    seen = set()
+    for message in manager._listen():
+        data = message['data']
+        if isinstance(data, list):
+            data = data[0]
+        if data['i'] < 0:
+            ready.set()
+            continue
+        if data['i'] not in seen:
+            seen.add(data['i'])
+            latencies.append(time.time() - data['t'])
+        if len(seen) >= expected:
+            break
+    results.put(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--rate', type=int, default=2000, help='mensajes por segundo')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--batch-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    conninfo = make_url(os.environ['DATABASE_URL']).set(drivername='postgresql').render_as_string(hide_password=False)
+    channel = f"bench_{uuid.uuid4().hex[:8]}"
+    expected = int(args.rate * args.seconds)
+
+    results = multiprocessing.Queue()
+    readies = [multiprocessing.Event() for _ in range(args.replicas)]
+    procs = [
+        multiprocessing.Process(target=subscriber, args=(conninfo, channel, expected, ready, results), daemon=True)
+        for ready in readies
+    ]
+    for proc in procs:
+        proc.start()
+
+    publisher = make_manager(conninfo, channel, args.batch_ms / 1000, write_only=True)
+    while not all(ready.is_set() for ready in readies):
+        publisher.emit('bench', {'t': time.time(), 'i': -1}, room='post:bench')
+        time.sleep(0.1)
+
+    print(f"{args.replicas} réplicas, {args.rate} mensajes/s durante {args.seconds:.0f} s, lotes de {args.batch_ms:g} ms")
+    start = time.perf_counter()
+    for i in range(expected):
+        # Ritmo constante: espera hasta el instante que le toca al mensaje i
+        delay = start + i / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        publisher.emit('bench', {'t': time.time(), 'i': i}, room='post:bench')
+
+    latencies = []
+    for _ in procs:
+        latencies.extend(results.get(timeout=args.seconds + 60))
+    elapsed = time.perf_counter() - start
+    for proc in procs:
+        proc.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  entregados {len(latencies)} de {expected * args.replicas}   "
+        f"{len(latencies) / elapsed:9.1f} entregas/s\n"
+        f"  p50 {statistics.median(latencies) * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms   "
+        f"máx {latencies[-1] * 1000:7.2f} ms"
+    )
+
+
+if __name__ == '__main__':
+    main()
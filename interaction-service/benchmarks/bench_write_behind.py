@@ -0,0 +1,167 @@
+"""
+Eventos por segundo con commit por evento frente a escritura diferida.
+
+N hilos (cada uno con su usuario, como N clientes) envían likes y
+comentarios sobre unos pocos posts y esperan la confirmación de cada uno
+antes de enviar el siguiente:
+  - per-event: una transacción y un commit por evento, como on_like_post.
+  - write-behind: WriteBehindQueue agrupa los eventos en lotes; la
+    confirmación llega al hacer commit el lote (durabilidad 'strict' y
+    'relaxed').
+Al final comprueba que likes_count y comments_count cuadran con las filas.
+
+Uso (desde interaction-service/, con DATABASE_URL apuntando a Postgres):
+    python benchmarks/bench_write_behind.py --threads 64 --seconds 10
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.models import db, Comment, Like, Post, User  # noqa: E402
+from app.write_behind import WriteBehindQueue  # noqa: E402
+
+
+class BenchQueue(WriteBehindQueue):
+    """WriteBehindQueue que en lugar de emitir por Socket.IO despierta al hilo que espera."""
+
+    def _deliver(self, like_results, comments, comment_counts):
+        for event, _ in like_results:
+            event['done'].set()
+        for event in comments:
+            event['done'].set()
+
+
+def per_event(user_id, post_id, kind):
+    with db.session.begin():
+        if kind == 'like':
+            Like.toggle(user_id, post_id)
+        else:
+            post = Post.query.with_for_update().get(post_id)
+            db.session.add(Comment(content="comentario", user_id=user_id, post_id=post_id))
+            post.comments_count += 1
+
+
+def run(app, user_ids, post_ids, seconds, comment_ratio, queue=None):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(user_id):
+        rng = random.Random(str(user_id))
+        local = []
+        with app.app_context():
+            while time.monotonic() < deadline:
+                post_id = rng.choice(post_ids)
+                kind = 'comment' if rng.random() < comment_ratio else 'like'
+                start = time.perf_counter()
+                if queue is None:
+                    per_event(user_id, post_id, kind)
+                else:
+                    done = threading.Event()
+                    queue.submit({
+                        'kind': kind, 'sid': None, 'id': uuid.uuid4(), 'done': done,
+                        'user_id': user_id, 'post_id': post_id, 'content': "comentario"
+                    })
+                    done.wait()
+                local.append(time.perf_counter() - start)
+            db.session.remove()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def make_queue(app, durability, batch_size, interval):
+    queue = BenchQueue()
+    queue.configure(app, True, batch_size, interval, 100000, durability)
+    queue._task = threading.Thread(target=queue._run, daemon=True)
+    queue._task.start()
+    return queue
+
+
+def report(name, latencies, seconds):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(
+        f"  {name:<22} {len(latencies) / seconds:9.1f} eventos/s   "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--comment-ratio', type=float, default=0.2)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--interval-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.threads + 2, 'max_overflow': 0}
+    db.init_app(app)
+
+    tag = uuid.uuid4().hex[:8]
+    with app.app_context():
+        db.create_all()
+        users = [
+            User(username=f"bench_{tag}_{i}", email=f"bench_{tag}_{i}@threadfit.dev", password_hash="x")
+            for i in range(args.threads)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+        posts = [
+            Post(content=f"Post caliente {i}", user_id=users[0].id, likes_count=0, comments_count=0)
+            for i in range(args.posts)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        post_ids = [post.id for post in posts]
+
+    print(f"{args.threads} hilos, {args.posts} posts, {args.comment_ratio:.0%} comentarios, {args.seconds:.0f} s por modo")
+    try:
+        modes = [
+            ("per-event", None),
+            ("write-behind strict", make_queue(app, 'strict', args.batch_size, args.interval_ms / 1000)),
+            ("write-behind relaxed", make_queue(app, 'relaxed', args.batch_size, args.interval_ms / 1000)),
+        ]
+        for name, queue in modes:
+            latencies = run(app, user_ids, post_ids, args.seconds, args.comment_ratio, queue)
+            report(name, latencies, args.seconds)
+            if queue is not None:
+                stats = queue.stats()
+                print(f"  {'':<22} {stats['batches']} lotes, {stats['flushed'] / max(stats['batches'], 1):.1f} eventos/lote")
+
+        with app.app_context():
+            for post in Post.query.filter(Post.id.in_(post_ids)):
+                likes = Like.query.filter_by(post_id=post.id).count()
+                comments = Comment.query.filter_by(post_id=post.id).count()
+                assert post.likes_count == likes, f"likes_count={post.likes_count} pero hay {likes} likes"
+                assert post.comments_count == comments, f"comments_count={post.comments_count} pero hay {comments}"
+    finally:
+        with app.app_context():
+            Post.query.filter(Post.id.in_(post_ids)).delete(synchronize_session=False)
+            User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
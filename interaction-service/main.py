@@ -1,17 +1,82 @@
-from flask import Flask
+from flask import Flask, jsonify
+from app.broadcast import feed_notifier, like_broadcaster
+from app.flood import event_limiter, parse_limits
+from app.api import likes
+from app.idempotency import op_cache
+from app.liked import liked_cache
 from app.models import db
+from app.pg_manager import PostgresManager
+from app.sessions import socket_sessions
+from app.stats import received_stats
+from app.write_behind import write_behind
 from app.config import Config
-from app.extensions import socketio
+from app.extensions import cors, jwt, socketio
+from app import routes  # noqa: F401  (registra los eventos de Socket.IO)
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 db.init_app(app)
+jwt.init_app(app)
+cors.init_app(app, resources={r"/*": {"origins": app.config['CORS_ORIGINS']}})
 
 with app.app_context():
     db.create_all()
 
-if __name__ == "__main__":
-    socketio.init_app(app, cors_allowed_origins="*")
-    socketio.run(app, host="0.0.0.0", port=5000,allow_unsafe_werkzeug=True)
+like_broadcaster.configure(app.config['LIKES_BROADCAST_WINDOW'])
+feed_notifier.configure(app, app.config['FEED_NOTIFY_WINDOW'])
+received_stats.configure(app, app.config['USER_STATS_FLUSH_WINDOW'])
+socket_sessions.configure(app.config['SOCKET_REAUTH_GRACE'])
+liked_cache.configure(app.config['LIKED_CACHE_TTL'], app.config['LIKED_CACHE_MAX_USERS'])
+op_cache.configure(app, app.config['OP_CACHE_MAX_ENTRIES'], app.config['OP_CACHE_TTL'], app.config['OP_DB_TTL'])
+event_limiter.configure(parse_limits(app.config['SOCKET_EVENT_LIMITS']), app.config['SOCKET_USER_LIMIT_FACTOR'])
+write_behind.configure(
+    app,
+    app.config['WRITE_BEHIND'],
+    app.config['WRITE_BEHIND_BATCH_SIZE'],
+    app.config['WRITE_BEHIND_INTERVAL'],
+    app.config['WRITE_BEHIND_MAX_QUEUE'],
+    app.config['WRITE_BEHIND_DURABILITY']
+)
+
+app.register_blueprint(likes)
+
+
+@app.route('/metrics/broadcast', methods=['GET'])
+def broadcast_metrics():
+    # Eventos recibidos frente a emitidos, para ajustar la ventana
+    return jsonify(like_broadcaster.stats()), 200
+
+
+@app.route('/metrics/socket_limits', methods=['GET'])
+def socket_limits_metrics():
+    # Eventos de Socket.IO descartados por el token bucket, por evento y ámbito
+    return jsonify(event_limiter.stats()), 200
+
 
+@app.route('/metrics/write_behind', methods=['GET'])
+def write_behind_metrics():
+    return jsonify(write_behind.stats()), 200
+
+
+def client_manager():
+    # Sin cola, cada réplica solo ve los eventos de sus propios clientes
+    if not app.config['SOCKETIO_PG_QUEUE']:
+        return None
+    return PostgresManager(
+        app.config['SQLALCHEMY_DATABASE_URI'].set(drivername='postgresql').render_as_string(hide_password=False),
+        channel=app.config['SOCKETIO_PG_CHANNEL'],
+        batch_window=app.config['SOCKETIO_PG_BATCH_WINDOW']
+    )
+
+
+socketio.init_app(
+    app,
+    cors_allowed_origins="*",
+    async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+    client_manager=client_manager()
+)
+
+if __name__ == "__main__":
+    # Servidor de desarrollo; en producción se arranca con wsgi.py (gevent)
+    socketio.run(app, host="0.0.0.0", port=5000, allow_unsafe_werkzeug=True)
@@ -0,0 +1,15 @@
+# Punto de entrada de producción: Flask-SocketIO sobre gevent con WebSocket.
+# monkey.patch_all() debe ejecutarse antes de importar nada más, en especial
+# psycopg: así detecta el select parcheado y sus esperas ceden el control a
+# otros greenlets en lugar de bloquear el proceso.
+from gevent import monkey
+monkey.patch_all()
+
+import os  # noqa: E402
+
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+
+from main import app, socketio  # noqa: E402
+
+if __name__ == "__main__":
+    socketio.run(app, host="0.0.0.0", port=int(os.environ.get('PORT', 5000)))
@@ -1,13 +1,19 @@
 from flask import Flask
 from .config import Config
+from .cache import feed_cache, start_feed_listener
 from .extensions import db, jwt, limiter, cors
+from .models import create_query_indexes
 from .routes import posts
+from .serializers import OrjsonProvider
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    if app.config['FAST_JSON']:
+        app.json = OrjsonProvider(app)
+
     # Inicializar extensiones
     print("Database URI:", app.config['SQLALCHEMY_DATABASE_URI'])
     db.init_app(app)
@@ -17,6 +23,12 @@ def create_app():
 
     with app.app_context():
         db.create_all()
+        create_query_indexes()
+
+    # Caché del feed, invalidada por NOTIFY desde esta y otras réplicas y desde interaction-service
+    feed_cache.configure(app.config['FEED_CACHE_MAX_ENTRIES'], app.config['FEED_CACHE_TTL'])
+    if app.config['FEED_CACHE_MAX_ENTRIES'] > 0 and app.config['FEED_CACHE_LISTEN']:
+        start_feed_listener(app.config['SQLALCHEMY_DATABASE_URI'])
 
     # Registrar Blueprints
     app.register_blueprint(posts)
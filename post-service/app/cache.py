@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import psycopg
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+FEED_CHANNEL = 'feed_changed'
+
+
+class FeedCache:
+    """
+    Caché LRU/TTL en memoria de páginas del feed ya serializadas.
+
+    Cada invalidación incrementa `version`; una página calculada con una
+    versión anterior se descarta en lugar de guardarse, así una escritura
+    concurrente nunca deja en caché un resultado obsoleto. Un cambio en los
+    contadores de un post solo invalida las páginas que lo contienen.
+    """
+
+    def __init__(self, max_entries=256, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries, ttl):
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, version):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            post_ids = frozenset(post['id'] for post in value['posts'])
+            self._entries[key] = (time.monotonic() + self.ttl, value, post_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, post_id=None):
+        with self._lock:
+            self.version += 1
+            if post_id is None:
+                self._entries.clear()
+                return
+            post_id = str(post_id)
+            for key in [key for key, entry in self._entries.items() if post_id in entry[2]]:
+                del self._entries[key]
+
+
+feed_cache = FeedCache()
+
+
+def notify_feed_changed(session, post_id=None):
+    """
+    Encola un NOTIFY en la transacción actual; Postgres solo lo entrega al
+    hacer commit, de modo que todas las réplicas (y post-service desde
+    interaction-service) invalidan su caché cuando el cambio ya es visible.
+
+    Sin `post_id` (alta o baja de un post) se invalida el feed completo.
+    """
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": FEED_CHANNEL, "payload": str(post_id) if post_id else '*'}
+    )
+
+
+def start_feed_listener(database_url):
+    """Hilo en segundo plano que escucha FEED_CHANNEL e invalida la caché."""
+    conninfo = database_url.set(drivername='postgresql').render_as_string(hide_password=False)
+
+    def listen():
+        while True:
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {FEED_CHANNEL}")
+                    # Por si se perdieron notificaciones mientras no había conexión
+                    feed_cache.invalidate()
+                    for notify in conn.notifies():
+                        if notify.payload in ('', '*'):
+                            feed_cache.invalidate()
+                        else:
+                            feed_cache.invalidate(notify.payload)
+            except Exception as e:
+                logger.error(f"Feed cache listener error: {str(e)}")
+                time.sleep(5)
+
+    thread = threading.Thread(target=listen, name='feed-cache-listener', daemon=True)
+    thread.start()
+    return thread
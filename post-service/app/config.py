@@ -17,3 +17,21 @@ class Config:
     JWT_QUERY_STRING_NAME = 'token'
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Flask-Limiter con los contadores en Postgres, compartidos entre réplicas
+    # (RATELIMIT_SHARED=false vuelve a la memoria de cada proceso). Cada réplica
+    # sincroniza sus hits cada RATELIMIT_SYNC_INTERVAL s; ver ratelimit_storage.py
+    RATELIMIT_STORAGE_URI = (
+        SQLALCHEMY_DATABASE_URI.set(drivername='postgresql+ratelimit').render_as_string(hide_password=False)
+        if os.environ.get('RATELIMIT_SHARED', 'true').lower() == 'true' else 'memory://'
+    )
+    RATELIMIT_STORAGE_OPTIONS = {'sync_interval': float(os.environ.get('RATELIMIT_SYNC_INTERVAL', 0.25))}
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+
+    # Caché en memoria de páginas del feed (0 entradas = desactivada)
+    FEED_CACHE_MAX_ENTRIES = int(os.environ.get('FEED_CACHE_MAX_ENTRIES', 256))
+    FEED_CACHE_TTL = float(os.environ.get('FEED_CACHE_TTL', 30))
+    FEED_CACHE_LISTEN = os.environ.get('FEED_CACHE_LISTEN', 'true').lower() == 'true'
+
+    # Codificador JSON basado en orjson para las respuestas
+    FAST_JSON = os.environ.get('FAST_JSON', 'false').lower() == 'true'
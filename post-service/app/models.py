@@ -1,9 +1,15 @@
+import logging
 import uuid
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from .extensions import db
 
+logger = logging.getLogger(__name__)
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -48,6 +54,10 @@ class Post(db.Model):
         return f"<Post {self.id} by {self.user.username}>"
 
 
+# Índice para la paginación por cursor del feed: ORDER BY timestamp DESC, id DESC
+ix_posts_timestamp_id = db.Index('ix_posts_timestamp_id', Post.timestamp.desc(), Post.id.desc())
+
+
 class Comment(db.Model):
     __tablename__ = 'comments'
 
@@ -64,6 +74,12 @@ class Comment(db.Model):
         return f"<Comment {self.id} by {self.user.username} on Post {self.post.id}>"
 
 
+# Índice para listar los comentarios de un post por (timestamp, id) en ambos sentidos
+ix_comments_post_id_timestamp = db.Index(
+    'ix_comments_post_id_timestamp', Comment.post_id, Comment.timestamp, Comment.id
+)
+
+
 class Like(db.Model):
     __tablename__ = 'likes'
 
@@ -80,3 +96,50 @@ class Like(db.Model):
 
     def __repr__(self):
         return f"<Like by {self.user.username} on Post {self.post.id}>"
+
+
+class UserStats(db.Model):
+    """
+    Totales por usuario que mantiene user-service (GET /user/<id>/stats).
+    Aquí solo se ajustan, en la misma transacción que el cambio, las filas
+    que ya existen; user-service crea cada fila al leerla por primera vez.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    posts_count = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    comments_received = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    ADD_SQL = text("""
+        UPDATE user_stats
+        SET posts_count = GREATEST(posts_count + :posts, 0),
+            likes_received = GREATEST(likes_received + :likes, 0),
+            comments_received = GREATEST(comments_received + :comments, 0),
+            updated_at = now()
+        WHERE user_id = :user_id
+    """)
+
+    @classmethod
+    def add(cls, user_id, posts=0, likes=0, comments=0):
+        db.session.execute(cls.ADD_SQL, {
+            "user_id": user_id, "posts": posts, "likes": likes, "comments": comments
+        })
+
+
+# Índices de los que dependen las consultas de este servicio. create_all()
+# no toca una tabla que ya existe, y `posts` o `comments` las puede crear
+# antes cualquier otro servicio (o venir de un despliegue anterior)
+QUERY_INDEXES = [ix_posts_timestamp_id, ix_comments_post_id_timestamp]
+
+
+def create_query_indexes():
+    """Crea los QUERY_INDEXES que falten (CREATE INDEX IF NOT EXISTS)."""
+    for index in QUERY_INDEXES:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+        except SQLAlchemyError as e:
+            # Otra réplica lo está creando a la vez
+            logger.warning(f"Could not create index {index.name}: {str(e)}")
@@ -0,0 +1,27 @@
+import base64
+import uuid
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, id_):
+    raw = f"{timestamp.isoformat()}|{id_}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp_str, id_str = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp_str), uuid.UUID(id_str)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def get_limit(args, default=10, maximum=100):
+    limit = args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
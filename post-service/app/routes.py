@@ -3,11 +3,17 @@ import uuid
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm import joinedload
+from sqlalchemy import column, select, true, tuple_, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import noload, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from .cache import feed_cache, notify_feed_changed
 from .extensions import db
-from .models import Comment, Post
+from .models import Comment, Like, Post, UserStats
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, get_limit
 from .schemas import PostSchema, CommentSchema
+from .serializers import dump_comments, dump_posts
 
 posts = Blueprint('posts', __name__, url_prefix='/posts')
 
@@ -25,37 +31,171 @@ def validate_uuid(id_str, name="ID"):
         return jsonify(response), 400
 
 
+MAX_COMMENTS_PREVIEW = 20
+
+
+def feed_query(comments_preview=None):
+    # Autores y comentarios en SELECTs por lotes (sin producto likes × comments);
+    # la colección de likes nunca se carga.
+    if comments_preview is None:
+        comments_option = selectinload(Post.comments).selectinload(Comment.user)
+    else:
+        # Los comentarios se cargan aparte con load_comment_previews()
+        comments_option = noload(Post.comments)
+
+    return Post.query.options(
+        selectinload(Post.user),
+        comments_option,
+        raiseload(Post.likes)
+    )
+
+
+def get_comments_preview(args):
+    if 'comments_preview' not in args:
+        return None
+    preview = args.get('comments_preview', 0, type=int)
+    return max(0, min(preview, MAX_COMMENTS_PREVIEW))
+
+
+def load_comment_previews(items, preview):
+    """
+    Carga los `preview` comentarios más recientes de cada post de la página
+    con una única consulta: por cada post, un LATERAL con LIMIT que recorre
+    ix_comments_post_id_timestamp hacia atrás, así el coste no depende de
+    cuántos comentarios tenga el post.
+    """
+    previews = {post.id: [] for post in items}
+
+    if preview and previews:
+        page = values(column('post_id', UUID(as_uuid=True)), name='page').data([(post_id,) for post_id in previews])
+        latest = (
+            select(Comment.id)
+            .where(Comment.post_id == page.c.post_id)
+            .order_by(Comment.timestamp.desc(), Comment.id.desc())
+            .limit(preview)
+            .lateral('latest')
+        )
+        comments = (
+            Comment.query.options(selectinload(Comment.user))
+            .filter(Comment.id.in_(select(latest.c.id).select_from(page).join(latest, true())))
+            .order_by(Comment.post_id, Comment.timestamp.desc(), Comment.id.desc())
+            .all()
+        )
+        for comment in comments:
+            previews[comment.post_id].append(comment)
+
+    for post in items:
+        set_committed_value(post, 'comments', previews[post.id])
+
+
+def get_liked_post_ids(user_id, post_ids):
+    """Devuelve el subconjunto de post_ids a los que user_id ha dado 'me gusta'."""
+    if not user_id or not post_ids:
+        return set()
+    rows = (
+        db.session.query(Like.post_id)
+        .filter(Like.user_id == uuid.UUID(str(user_id)), Like.post_id.in_(post_ids))
+        .all()
+    )
+    return {row.post_id for row in rows}
+
+
+def apply_liked_overlay(posts_data, user_id):
+    """
+    Añade `liked_by_me` sobre la página compartida (posiblemente en caché)
+    sin modificarla; el flag es por usuario y nunca se guarda en caché.
+    """
+    liked_post_ids = get_liked_post_ids(user_id, [uuid.UUID(post['id']) for post in posts_data])
+    liked = {str(post_id) for post_id in liked_post_ids}
+    return [dict(post, liked_by_me=post['id'] in liked) for post in posts_data]
+
+
+def feed_cache_key(args):
+    comments_preview = get_comments_preview(args)
+    if 'after' in args or 'limit' in args:
+        return ('cursor', args.get('after'), get_limit(args), comments_preview)
+    return (
+        'page',
+        args.get('page', 1, type=int),
+        args.get('per_page', 10, type=int),
+        comments_preview
+    )
+
+
+def build_page(args):
+    comments_preview = get_comments_preview(args)
+    page = args.get('page', 1, type=int)
+    per_page = args.get('per_page', 10, type=int)
+
+    pagination = (
+        feed_query(comments_preview)
+        .order_by(Post.timestamp.desc(), Post.id.desc())
+        .paginate(page=page, per_page=per_page, error_out=False)
+    )
+
+    if comments_preview is not None:
+        load_comment_previews(pagination.items, comments_preview)
+
+    return {
+        "posts": dump_posts(pagination.items),
+        "total": pagination.total,
+        "pages": pagination.pages,
+        "current_page": pagination.page,
+        "per_page": pagination.per_page,
+        "has_next": pagination.has_next,
+        "has_prev": pagination.has_prev,
+    }
+
+
+def build_cursor_page(args):
+    limit = get_limit(args)
+    after = args.get('after')
+    comments_preview = get_comments_preview(args)
+
+    query = feed_query(comments_preview)
+
+    if after:
+        after_timestamp, after_id = decode_cursor(after)
+        query = query.filter(tuple_(Post.timestamp, Post.id) < tuple_(after_timestamp, after_id))
+
+    # Se pide un elemento extra para saber si hay página siguiente
+    items = query.order_by(Post.timestamp.desc(), Post.id.desc()).limit(limit + 1).all()
+    has_next = len(items) > limit
+    items = items[:limit]
+
+    if comments_preview is not None:
+        load_comment_previews(items, comments_preview)
+
+    return {
+        "posts": dump_posts(items),
+        "limit": limit,
+        "has_next": has_next,
+        "next_cursor": encode_cursor(items[-1].timestamp, items[-1].id) if has_next else None,
+    }
+
+
 @posts.route('/all_posts', methods=['GET'])
 @jwt_required()
 def get_all_posts():
     try:
         current_user_id = get_jwt_identity()
 
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-
-        pagination = (
-            Post.query.options(
-                joinedload(Post.user),
-                joinedload(Post.likes),
-                joinedload(Post.comments)
-            )
-            .order_by(Post.timestamp.desc())
-            .paginate(page=page, per_page=per_page, error_out=False)
-        )
+        key = feed_cache_key(request.args)
+        payload = feed_cache.get(key)
 
-        posts_data = PostSchema(many=True, context={'current_user_id': current_user_id}).dump(pagination.items)
+        if payload is None:
+            version = feed_cache.version
+            # Modo cursor (?after=<cursor>&limit=N): sin OFFSET ni COUNT(*)
+            if key[0] == 'cursor':
+                payload = build_cursor_page(request.args)
+            else:
+                payload = build_page(request.args)
+            feed_cache.set(key, payload, version)
 
-        return jsonify({
-            "posts": posts_data,
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": pagination.page,
-            "per_page": pagination.per_page,
-            "has_next": pagination.has_next,
-            "has_prev": pagination.has_prev,
-        }), 200
+        return jsonify(dict(payload, posts=apply_liked_overlay(payload["posts"], current_user_id))), 200
 
+    except InvalidCursor:
+        return jsonify({"msg": "Cursor inválido."}), 400
     except Exception as e:
         return jsonify({
             "error": "Error al obtener publicaciones",
@@ -79,7 +219,10 @@ def create_post():
 
         new_post = Post(content=content, user_id=user_id)
         db.session.add(new_post)
+        UserStats.add(user_id, posts=1)
+        notify_feed_changed(db.session)
         db.session.commit()
+        feed_cache.invalidate()
 
         return jsonify({
             "msg": "Publicación creada con éxito.",
@@ -115,8 +258,12 @@ def delete_post(post_id):
         return jsonify({"msg": "No tienes permiso para realizar esta acción."}), 403
 
     try:
+        # Con el post se borran sus likes y comentarios: se descuentan de su autor
+        UserStats.add(post.user_id, posts=-1, likes=-(post.likes_count or 0), comments=-(post.comments_count or 0))
         db.session.delete(post)
+        notify_feed_changed(db.session)
         db.session.commit()
+        feed_cache.invalidate()
         return jsonify({"msg": "Publicación eliminada con éxito."}), 200
 
     except Exception as e:
@@ -135,12 +282,44 @@ def get_comments(post_id):
     if isinstance(post_uuid_or_resp, tuple):
         return post_uuid_or_resp
 
-    post = Post.query.options(joinedload(Post.comments)).get(post_uuid_or_resp)
+    post_exists = db.session.query(Post.id).filter_by(id=post_uuid_or_resp).first()
 
-    if not post:
+    if not post_exists:
         return jsonify({"error": "Publicación no encontrada"}), 404
 
-    return jsonify(comments_schema.dump(post.comments)), 200
+    # Autores en un único SELECT por lotes; orden (timestamp, id) servido por
+    # el índice ix_comments_post_id_timestamp
+    query = (
+        Comment.query.options(selectinload(Comment.user))
+        .filter(Comment.post_id == post_uuid_or_resp)
+    )
+
+    # Modo cursor (?before=<cursor>&limit=N): del más reciente al más antiguo
+    if 'before' in request.args or 'limit' in request.args:
+        limit = get_limit(request.args, default=20)
+        before = request.args.get('before')
+
+        if before:
+            try:
+                before_timestamp, before_id = decode_cursor(before)
+            except InvalidCursor:
+                return jsonify({"msg": "Cursor inválido."}), 400
+            query = query.filter(tuple_(Comment.timestamp, Comment.id) < tuple_(before_timestamp, before_id))
+
+        items = query.order_by(Comment.timestamp.desc(), Comment.id.desc()).limit(limit + 1).all()
+        has_next = len(items) > limit
+        items = items[:limit]
+
+        return jsonify({
+            "comments": dump_comments(items),
+            "limit": limit,
+            "has_next": has_next,
+            "next_cursor": encode_cursor(items[-1].timestamp, items[-1].id) if has_next else None,
+        }), 200
+
+    comments = query.order_by(Comment.timestamp, Comment.id).all()
+
+    return jsonify(dump_comments(comments)), 200
 
 
 @posts.route('/comments/<string:comment_id>', methods=['DELETE'])
@@ -161,8 +340,14 @@ def delete_comment(comment_id):
         return jsonify({"msg": "No tienes permiso para realizar esta acción."}), 403
 
     try:
+        post_id = comment.post_id
+        post = comment.post
+        post.comments_count = max((post.comments_count or 0) - 1, 0)
+        UserStats.add(post.user_id, comments=-1)
         db.session.delete(comment)
+        notify_feed_changed(db.session, post_id)
         db.session.commit()
+        feed_cache.invalidate(post_id)
         return jsonify({"msg": "Comentario eliminado con éxito."}), 200
 
     except Exception as e:
@@ -40,6 +40,7 @@ class PostSchema(BaseSchema):
     likes_count = fields.Method("get_likes_count")
     comments_count = fields.Method("get_comments_count")
     comments = fields.Nested(CommentSchema, many=True)
+    liked_by_me = fields.Method("check_liked_by_user")
 
     class Meta(BaseSchema.Meta):
         model = Post
@@ -50,7 +51,8 @@ class PostSchema(BaseSchema):
             "user",
             "likes_count",
             "comments_count",
-            "comments"
+            "comments",
+            "liked_by_me"
         )
 
     def get_likes_count(self, obj):
@@ -58,3 +60,7 @@ class PostSchema(BaseSchema):
 
     def get_comments_count(self, obj):
         return obj.comments_count or 0
+
+    def check_liked_by_user(self, obj):
+        # El conjunto se calcula para toda la página con una sola consulta
+        return obj.id in self.context.get('liked_post_ids', ())
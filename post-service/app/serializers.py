@@ -0,0 +1,104 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+from .schemas import PostSchema, CommentSchema
+
+
+# -------------------------------------------------------------------
+# SERIALIZADORES PRECOMPILADOS
+# -------------------------------------------------------------------
+
+def compile_schema(schema):
+    """
+    Genera una función plana equivalente a `schema.dump(obj)`.
+
+    Los campos UUID, String, DateTime (ISO), Method y Nested se traducen a
+    accesos directos a atributos; cualquier otro campo delega en
+    `field.serialize()`, así que la salida es siempre idéntica a la de
+    marshmallow. Los esquemas con hooks pre/post dump no se admiten.
+    """
+    if schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]:
+        raise ValueError(f"{type(schema).__name__} usa hooks de dump y no se puede precompilar")
+
+    namespace = {}
+    body = []
+    items = []
+
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        attr = field.attribute or name
+        key = field.data_key or name
+        value = f"v{index}"
+        helper = f"f{index}"
+
+        if '.' in attr:
+            namespace[helper] = field
+            items.append(f"{key!r}: {helper}.serialize({attr!r}, obj)")
+            continue
+
+        if isinstance(field, fields.Method) and field.serialize_method_name:
+            namespace[helper] = getattr(schema, field.serialize_method_name)
+            items.append(f"{key!r}: {helper}(obj)")
+            continue
+
+        body.append(f"    {value} = obj.{attr}")
+
+        if isinstance(field, fields.Nested) and not field.only and not field.exclude:
+            namespace[helper] = compile_schema(field.schema)
+            if field.many or field.schema.many:
+                items.append(f"{key!r}: None if {value} is None else [{helper}(x) for x in {value}]")
+            else:
+                items.append(f"{key!r}: None if {value} is None else {helper}({value})")
+        elif type(field) is fields.DateTime and field.format in (None, 'iso'):
+            items.append(f"{key!r}: None if {value} is None else {value}.isoformat()")
+        elif type(field) in (fields.String, fields.UUID):
+            items.append(f"{key!r}: None if {value} is None else str({value})")
+        else:
+            namespace[helper] = field
+            items.append(f"{key!r}: {helper}._serialize({value}, {attr!r}, obj)")
+
+    source = "def dump(obj):\n" + "\n".join(body) + "\n    return {" + ", ".join(items) + "}\n"
+    exec(compile(source, f"<compiled {type(schema).__name__}>", "exec"), namespace)
+    return namespace['dump']
+
+
+dump_post = compile_schema(PostSchema())
+dump_comment = compile_schema(CommentSchema())
+
+
+def dump_posts(posts):
+    return [dump_post(post) for post in posts]
+
+
+def dump_comments(comments):
+    return [dump_comment(comment) for comment in comments]
+
+
+# -------------------------------------------------------------------
+# CODIFICADOR JSON RÁPIDO
+# -------------------------------------------------------------------
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask basado en orjson (activable con FAST_JSON).
+
+    Mantiene las claves ordenadas como el proveedor por defecto, pero emite
+    UTF-8 sin escapar los caracteres no ASCII: el JSON es equivalente, no
+    idéntico byte a byte.
+    """
+
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options) + b"\n",
+            mimetype=self.mimetype
+        )
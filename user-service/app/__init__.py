@@ -1,6 +1,9 @@
+import click
 from flask import Flask
 from .config import Config
 from .extensions import db, jwt, limiter, cors
+from .models import UserStats
+from .profiles import profile_cache
 from .routes import user
 
 
@@ -17,7 +20,16 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    profile_cache.configure(app.config['PROFILE_CACHE_MAX_ENTRIES'], app.config['PROFILE_CACHE_TTL'])
+
     # Registrar Blueprints
     app.register_blueprint(user)
 
+    @app.cli.command('reconcile-stats')
+    def reconcile_stats():
+        """Recalcula user_stats a partir de posts, likes y comments."""
+        repaired = UserStats.reconcile()
+        db.session.commit()
+        click.echo(f"user_stats: {repaired} filas creadas o corregidas")
+
     return app
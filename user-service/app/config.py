@@ -17,3 +17,21 @@ class Config:
     JWT_QUERY_STRING_NAME = 'token'
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
+    # Flask-Limiter con los contadores en Postgres, compartidos entre réplicas
+    # (RATELIMIT_SHARED=false vuelve a la memoria de cada proceso). Cada réplica
+    # sincroniza sus hits cada RATELIMIT_SYNC_INTERVAL s; ver ratelimit_storage.py
+    RATELIMIT_STORAGE_URI = (
+        SQLALCHEMY_DATABASE_URI.set(drivername='postgresql+ratelimit').render_as_string(hide_password=False)
+        if os.environ.get('RATELIMIT_SHARED', 'true').lower() == 'true' else 'memory://'
+    )
+    RATELIMIT_STORAGE_OPTIONS = {'sync_interval': float(os.environ.get('RATELIMIT_SYNC_INTERVAL', 0.25))}
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+
+    # POST /user/batch: máximo de IDs por petición y max-age de la respuesta (s)
+    USER_BATCH_MAX_IDS = int(os.environ.get('USER_BATCH_MAX_IDS', 100))
+    USER_BATCH_MAX_AGE = int(os.environ.get('USER_BATCH_MAX_AGE', 60))
+
+    # Caché en memoria de perfiles compactos (0 entradas = desactivada)
+    PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', 10000))
+    PROFILE_CACHE_TTL = float(os.environ.get('PROFILE_CACHE_TTL', 60))
@@ -1,5 +1,6 @@
 # Importaciones de terceros
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import text
 from sqlalchemy.sql import func
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
@@ -167,6 +168,102 @@ class Like(db.Model):
         """
         return f"<Like by {self.user.username} on Post {self.post.id}>"
 
+class UserStats(db.Model):
+    """
+    Totales de un usuario mantenidos de forma incremental: post-service e
+    interaction-service los ajustan en la misma transacción en la que crean
+    o borran posts, likes y comentarios. Solo se ajustan filas que ya
+    existen; la fila de cada usuario se calcula la primera vez que se lee
+    (compute) y `flask reconcile-stats` la recalcula si se desvía.
+    """
+    __tablename__ = 'user_stats'
+
+    # Columnas de la tabla 'user_stats'
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    posts_count = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    comments_received = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Totales de un usuario a partir de los contadores de sus posts, que se
+    # mantienen en la misma transacción que cada like y comentario
+    COMPUTE_SQL = text("""
+        INSERT INTO user_stats (user_id, posts_count, likes_received, comments_received, updated_at)
+        SELECT u.id, count(p.id), COALESCE(sum(p.likes_count), 0), COALESCE(sum(p.comments_count), 0), now()
+        FROM users u
+        LEFT JOIN posts p ON p.user_id = u.id
+        WHERE u.id = :user_id
+        GROUP BY u.id
+        ON CONFLICT (user_id) DO NOTHING
+    """)
+
+    # Recalcula todos los usuarios desde las filas de likes y comments (no
+    # desde los contadores de posts) y solo reescribe las filas que difieren
+    RECONCILE_SQL = text("""
+        WITH post_likes AS (
+            SELECT post_id, count(*) AS n FROM likes GROUP BY post_id
+        ), post_comments AS (
+            SELECT post_id, count(*) AS n FROM comments GROUP BY post_id
+        ), totals AS (
+            SELECT p.user_id,
+                   count(*) AS posts_count,
+                   COALESCE(sum(pl.n), 0) AS likes_received,
+                   COALESCE(sum(pc.n), 0) AS comments_received
+            FROM posts p
+            LEFT JOIN post_likes pl ON pl.post_id = p.id
+            LEFT JOIN post_comments pc ON pc.post_id = p.id
+            GROUP BY p.user_id
+        )
+        INSERT INTO user_stats (user_id, posts_count, likes_received, comments_received, updated_at)
+        SELECT u.id, COALESCE(t.posts_count, 0), COALESCE(t.likes_received, 0), COALESCE(t.comments_received, 0), now()
+        FROM users u
+        LEFT JOIN totals t ON t.user_id = u.id
+        ON CONFLICT (user_id) DO UPDATE
+        SET posts_count = EXCLUDED.posts_count,
+            likes_received = EXCLUDED.likes_received,
+            comments_received = EXCLUDED.comments_received,
+            updated_at = EXCLUDED.updated_at
+        WHERE (user_stats.posts_count, user_stats.likes_received, user_stats.comments_received)
+              IS DISTINCT FROM (EXCLUDED.posts_count, EXCLUDED.likes_received, EXCLUDED.comments_received)
+    """)
+
+    @classmethod
+    def get_or_compute(cls, user_id):
+        """
+        Lee la fila de estadísticas de un usuario, calculándola si aún no existe.
+
+        Args:
+            user_id (UUID): ID del usuario.
+
+        Returns:
+            UserStats | None: Estadísticas del usuario, o None si el usuario no existe.
+        """
+        stats = db.session.get(cls, user_id)
+        if stats is None:
+            db.session.execute(cls.COMPUTE_SQL, {"user_id": user_id})
+            db.session.commit()
+            stats = db.session.get(cls, user_id)
+        return stats
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Recalcula las estadísticas de todos los usuarios.
+
+        Returns:
+            int: Número de filas creadas o corregidas.
+        """
+        return db.session.execute(cls.RECONCILE_SQL).rowcount
+
+    def __repr__(self):
+        """
+        Representación en cadena del objeto UserStats.
+
+        Returns:
+            str: Representación de las estadísticas.
+        """
+        return f"<UserStats {self.user_id}>"
+
 # -------------------------------------------------------------------
 # FIN DE LOS MODELOS
 # -------------------------------------------------------------------
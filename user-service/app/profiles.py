@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from .extensions import db
+
+PROFILES_SQL = text("""
+    SELECT id, username FROM users
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+""")
+
+
+def profile_etag(profile):
+    # Cambia solo si cambia algún campo del perfil compacto
+    return hashlib.sha1(f"{profile['id']}:{profile['username']}".encode()).hexdigest()[:16]
+
+
+class ProfileCache:
+    """
+    Caché LRU/TTL en memoria de perfiles compactos ({id, username, etag}),
+    para servir a los autores más repetidos del feed sin ir a la base de
+    datos. Los usuarios que no existen no se guardan: pueden registrarse
+    en cualquier momento.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries, ttl):
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self._entries.clear()
+
+    def lookup(self, user_ids):
+        """Devuelve ({user_id: perfil} en caché, [user_ids que faltan])."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is None or entry[0] < now:
+                    missing.append(user_id)
+                    continue
+                self._entries.move_to_end(user_id)
+                found[user_id] = entry[1]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, profiles):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for user_id, profile in profiles.items():
+                self._entries[user_id] = (expires_at, profile)
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+profile_cache = ProfileCache()
+
+
+def get_profiles(user_ids):
+    """
+    Perfiles compactos de user_ids ({user_id: perfil}; los que no existen no
+    aparecen), con una única consulta sobre la clave primaria de `users`
+    para los que no están en caché.
+    """
+    user_ids = list(dict.fromkeys(uuid.UUID(str(user_id)) for user_id in user_ids))
+    found, missing = profile_cache.lookup(user_ids)
+
+    if missing:
+        loaded = {}
+        for row in db.session.execute(PROFILES_SQL, {"ids": missing}):
+            profile = {"id": str(row.id), "username": row.username}
+            profile["etag"] = profile_etag(profile)
+            loaded[row.id] = profile
+        profile_cache.store(loaded)
+        found.update(loaded)
+
+    return found
@@ -3,14 +3,16 @@
 # -------------------------------------------------------------------
 
 # Importaciones estándar
-# (En este caso, no se utilizan librerías estándar de Python)
+import hashlib
+import uuid
 
 # Importaciones de terceros
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 # Importaciones locales
-from .models import User, Post
+from .models import User, Post, UserStats
+from .profiles import get_profiles
 from .schemas import UserSchema
 
 # -------------------------------------------------------------------
@@ -105,3 +107,100 @@ def get_user_posts(user_id):
         "pages": posts_pagination.pages,
         "current_page": posts_pagination.page
     }), 200
+
+
+@user.route('/<string:user_id>/stats', methods=['GET'])
+@jwt_required()
+def get_user_stats(user_id):
+    """
+    Ruta para obtener los totales de un usuario: posts publicados, 'me gusta'
+    y comentarios recibidos. Lee una sola fila de `user_stats`.
+
+    Método: GET
+    Autenticación: Requerida (JWT)
+
+    Parámetros de URL:
+        - user_id (string): ID del usuario.
+
+    Retorna:
+        - 200: {user_id, posts_count, likes_received, comments_received}.
+        - 400: Si el ID no es válido.
+        - 404: Si el usuario no existe.
+    """
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"msg": "ID de usuario inválido."}), 400
+
+    stats = UserStats.get_or_compute(user_uuid)
+
+    if not stats:
+        return jsonify({"msg": "Usuario no encontrado."}), 404
+
+    return jsonify({
+        "user_id": str(stats.user_id),
+        "posts_count": stats.posts_count,
+        "likes_received": stats.likes_received,
+        "comments_received": stats.comments_received
+    }), 200
+
+
+@user.route('/batch', methods=['POST'])
+@jwt_required()
+def get_users_batch():
+    """
+    Ruta para obtener los perfiles compactos de varios usuarios a la vez,
+    pensada para hidratar los autores de un feed sin volver a unir `users`.
+
+    Método: POST
+    Autenticación: Requerida (JWT)
+
+    Cuerpo (JSON):
+        - ids (list): IDs de usuario, como mucho USER_BATCH_MAX_IDS.
+        - etags (dict, opcional): {id: etag} de los perfiles que el cliente
+          ya tiene; los que no han cambiado se devuelven en `not_modified`
+          en lugar de repetirse.
+
+    Retorna:
+        - 200: {"users": [{id, username, etag}], "not_modified": [ids], "missing": [ids]},
+          con un ETag de la respuesta completa y Cache-Control.
+        - 304: Si el ETag enviado en If-None-Match coincide.
+        - 400: Si la lista de IDs no es válida o supera el máximo.
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    etags = data.get('etags') or {}
+    max_ids = current_app.config['USER_BATCH_MAX_IDS']
+
+    if not isinstance(ids, list) or not isinstance(etags, dict):
+        return jsonify({"msg": "Se esperaba una lista 'ids'."}), 400
+    if len(ids) > max_ids:
+        return jsonify({"msg": f"Como mucho {max_ids} IDs por petición."}), 400
+
+    try:
+        requested = list(dict.fromkeys(uuid.UUID(str(user_id)) for user_id in ids))
+    except ValueError:
+        return jsonify({"msg": "IDs de usuario inválidos."}), 400
+
+    profiles = get_profiles(requested)
+
+    users, not_modified, missing = [], [], []
+    digest = hashlib.sha1()
+    for user_id in requested:
+        profile = profiles.get(user_id)
+        if profile is None:
+            missing.append(str(user_id))
+        elif etags.get(str(user_id)) == profile['etag']:
+            not_modified.append(str(user_id))
+        else:
+            users.append(profile)
+        # El ETag de la respuesta depende de los perfiles y de los etags enviados
+        digest.update(f"{user_id}:{profile['etag'] if profile else '-'}:{etags.get(str(user_id))};".encode())
+
+    etag = f'W/"{digest.hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={current_app.config['USER_BATCH_MAX_AGE']}"}
+
+    if etag in request.headers.get('If-None-Match', ''):
+        return '', 304, headers
+
+    return jsonify({"users": users, "not_modified": not_modified, "missing": missing}), 200, headers